@@ -0,0 +1,156 @@
+import logging
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_safe
+from django.views.decorators.vary import vary_on_cookie
+
+from .conditional import (Validators, author_scopes, follow_scopes,
+                          group_scopes, index_scopes, post_scopes)
+from .export import Export, parse_tables
+from .models import Group, Post
+from .paginator import CursorPaginator
+from .views import FEED_ORDERING, FOLLOW_FEED_ORDERING
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+# Columns read for serialized post, text of post is the only big one
+POST_FIELDS = (
+    "id",
+    "text",
+    "pub_date",
+    "image",
+    "image_width",
+    "image_height",
+    "comment_count",
+    "author__username",
+    "group__slug",
+)
+JSON_PARAMS = {"ensure_ascii": False, "separators": (",", ":")}
+
+
+def serialize_post(post) -> dict:
+    return {
+        "id": post.pk,
+        "text": post.text,
+        "pub_date": post.pub_date.isoformat(),
+        "author": post.author.username,
+        "group": post.group.slug if post.group_id else None,
+        "image": post.image.url if post.image else None,
+        # Size of original image is known once thumbnails are rendered
+        "image_width": post.image_width,
+        "image_height": post.image_height,
+        "comment_count": post.comment_count,
+    }
+
+
+def json_response(data, **kwargs):
+    return JsonResponse(data, json_dumps_params=JSON_PARAMS, **kwargs)
+
+
+def post_list(request, posts, ordering=FEED_ORDERING):
+    """Keyset page of posts with opaque cursors of neighbour pages."""
+    paginator = CursorPaginator(
+        posts.only(*POST_FIELDS), settings.PER_PAGE_API, ordering
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    return json_response(
+        {
+            "results": [serialize_post(post) for post in page],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        }
+    )
+
+
+# Every view answers ``304`` for matching ``If-None-Match`` before any
+# query of posts. Clients must revalidate each time.
+index_validators = Validators("api", index_scopes)
+group_validators = Validators("api", group_scopes)
+profile_validators = Validators("api", author_scopes)
+follow_validators = Validators("api", follow_scopes)
+post_validators = Validators("api", post_scopes)
+
+
+@require_safe
+@cache_control(no_cache=True)
+@index_validators
+def index(request):
+    """Latest posts of all authors."""
+    return post_list(request, Post.objects.feed())
+
+
+@require_safe
+@cache_control(no_cache=True)
+@group_validators
+def group_posts(request, slug):
+    """Latest posts of group."""
+    group = get_object_or_404(Group.objects.only("id"), slug=slug)
+    return post_list(request, group.group_posts.feed())
+
+
+@require_safe
+@cache_control(no_cache=True)
+@profile_validators
+def profile(request, username):
+    """Latest posts of author."""
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    return post_list(request, author.posts.feed())
+
+
+@require_safe
+@cache_control(private=True, no_cache=True)
+@vary_on_cookie
+@follow_validators
+def follow_index(request):
+    """Latest posts of authors user follows, session is required."""
+    if not request.user.is_authenticated:
+        return json_response({"error": "login required"}, status=401)
+    return post_list(
+        request,
+        Post.objects.follow_feed(request.user),
+        FOLLOW_FEED_ORDERING,
+    )
+
+
+@require_safe
+@cache_control(no_cache=True)
+@post_validators
+def post_view(request, post_id):
+    """Single post."""
+    post = get_object_or_404(
+        Post.objects.feed().only(*POST_FIELDS), pk=post_id
+    )
+    return json_response(serialize_post(post))
+
+
+def logged_export(stream):
+    yield from stream
+    logger.info(stream.report())
+
+
+@staff_member_required
+@require_safe
+def export(request):
+    """Stream NDJSON dump of ``?tables=``, gzipped with ``?gzip=1``."""
+    try:
+        tables = parse_tables(request.GET.get("tables"))
+    except ValueError as error:
+        return json_response({"error": str(error)}, status=400)
+    compress = request.GET.get("gzip") == "1"
+    stream = Export(tables, compress)
+    if compress:
+        content_type, filename = "application/gzip", "export.ndjson.gz"
+    else:
+        content_type, filename = "application/x-ndjson", "export.ndjson"
+    response = StreamingHttpResponse(
+        logged_export(stream), content_type=content_type
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+
+        from . import signals  # noqa: F401
+
+        # Pillow refuses to decode larger images anywhere: forms, sorl
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
@@ -0,0 +1,152 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+from .models import Follow, Post
+
+GENERATION_KEY = "generation:{}"
+MODIFIED_KEY = "modified:{}"
+POST_COUNT_KEY = "post_count:{}"
+
+
+def _generation_key(*scope) -> str:
+    return GENERATION_KEY.format(":".join(str(part) for part in scope))
+
+
+def _modified_key(*scope) -> str:
+    return MODIFIED_KEY.format(":".join(str(part) for part in scope))
+
+
+def generation(*scope) -> int:
+    """Return current generation of cached fragments for scope.
+
+    Generation is a part of fragment cache key, so bumping it makes all
+    fragments of scope unreachable at once, while fragments of other
+    scopes stay cached. Missing counter starts from current time, so
+    evicted counter never returns to value used by stale fragments.
+    """
+    key = _generation_key(*scope)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, int(time.time() * 1000000), None)
+        value = cache.get(key)
+    return value
+
+
+def etag(*parts) -> str:
+    """Validator of response built from ``parts``, e.g. generations.
+
+    Pages are invalidated by bumping generations, so tag made of them
+    changes together with the content, and is known without reading it.
+    """
+    raw = ":".join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def modified(*scopes) -> float:
+    """Timestamp of the latest bump of any of ``scopes``.
+
+    Unknown time, e.g. of evicted key, is taken as now, so page looks
+    modified rather than stale.
+    """
+    keys = [_modified_key(*scope) for scope in scopes]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, None)
+    return max([now if key not in found else found[key] for key in keys])
+
+
+def bump_generation(*scope):
+    """Invalidate all cached fragments of scope in O(1)."""
+    try:
+        cache.incr(_generation_key(*scope))
+    except ValueError:
+        pass
+    cache.set(_modified_key(*scope), time.time(), None)
+
+
+def bump_post_generations(author_id, group_id=None):
+    """Invalidate pages showing author's post: index, group, profile."""
+    bump_generation("index")
+    bump_generation("author", author_id)
+    if group_id is not None:
+        bump_generation("group", group_id)
+
+
+def post_count_key(*scope) -> str:
+    """Cache key of posts count used by numbered paginator of scope."""
+    return POST_COUNT_KEY.format(":".join(str(part) for part in scope))
+
+
+def change_post_count(delta, group_id=None, index=True):
+    """Keep cached posts counts exact on writes, TTL bounds the rest."""
+    keys = [post_count_key("index")] if index else []
+    if group_id is not None:
+        keys.append(post_count_key("group", group_id))
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def generations(*scopes) -> list:
+    """Return generations of ``scopes`` read with one cache query."""
+    keys = [_generation_key(*scope) for scope in scopes]
+    found = cache.get_many(keys)
+    return [
+        found[key] if key in found else generation(*scope)
+        for key, scope in zip(keys, scopes)
+    ]
+
+
+def follow_feed_scopes(user_id) -> list:
+    """Generation scopes of user's follow feed.
+
+    Feed shows posts of followed authors, so it is versioned by their
+    generations, which post and comment writes bump anyway, instead of
+    every write touching the feed of each follower. ``("follow", id)``
+    is bumped when the user follows or unfollows somebody.
+    """
+    authors = (
+        Follow.objects.filter(user_id=user_id)
+        .order_by("author_id")
+        .values_list("author_id", flat=True)
+    )
+    return [("follow", user_id)] + [
+        ("author", author_id) for author_id in authors
+    ]
+
+
+def follow_feed_version(user_id) -> str:
+    """Return current version of user's follow feed fragments."""
+    return etag(*generations(*follow_feed_scopes(user_id)))
+
+
+def invalidate_group(group_id):
+    """Group title and slug are shown on every card of group's posts."""
+    bump_generation("index")
+    bump_generation("group", group_id)
+    authors = (
+        Post.objects.filter(group_id=group_id)
+        .order_by()
+        .values_list("author_id", flat=True)
+        .distinct()
+    )
+    for author_id in authors.iterator():
+        bump_generation("author", author_id)
+
+
+def invalidate_posts(posts):
+    """Drop every cached page showing any of ``posts`` at once."""
+    bump_generation("index")
+    groups = posts.order_by().values_list("group", flat=True).distinct()
+    for group_id in groups.iterator():
+        if group_id is not None:
+            bump_generation("group", group_id)
+    authors = posts.order_by().values_list("author", flat=True).distinct()
+    for author_id in authors.iterator():
+        bump_generation("author", author_id)
@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.views.decorators.http import condition
+
+from . import cache
+from .models import Group, Post
+
+User = get_user_model()
+
+
+def _pk(queryset, field="pk"):
+    return queryset.values_list(field, flat=True).first()
+
+
+def index_scopes(request):
+    return [("index",)]
+
+
+def group_scopes(request, slug):
+    group_id = _pk(Group.objects.filter(slug=slug))
+    if group_id is not None:
+        return [("group", group_id)]
+
+
+def author_scopes(request, username):
+    author_id = _pk(User.objects.filter(username=username))
+    if author_id is not None:
+        return [("author", author_id)]
+
+
+def profile_scopes(request, username):
+    """Posts of author and counters on author's card."""
+    scopes = author_scopes(request, username)
+    if scopes is not None:
+        return scopes + [("stats", scopes[0][1])]
+
+
+def post_scopes(request, post_id):
+    author_id = _pk(Post.objects.filter(pk=post_id), "author_id")
+    if author_id is not None:
+        return [("author", author_id)]
+
+
+def viewer_follows(user_id):
+    """Follow buttons and suggestions shown to the viewer."""
+    return [("follow", user_id), ("suggestions",)]
+
+
+def follow_scopes(request):
+    if request.user.is_authenticated:
+        return cache.follow_feed_scopes(request.user.pk)
+
+
+class Validators:
+    """``ETag`` and ``Last-Modified`` of page made of its generations.
+
+    ``scopes(request, **kwargs)`` returns generation scopes of page
+    content, ``None`` for missing object. Every change bumps them, so
+    ``304`` is answered before any query of page content. Pages differ
+    by viewer, so tag includes the user and generations of scopes from
+    ``viewer_scopes(user_id)``, like their follows. ``Last-Modified`` is
+    given to anonymous visitors only.
+    """
+
+    def __init__(self, prefix, scopes, viewer_scopes=None):
+        self.prefix = prefix
+        self.scopes = scopes
+        self.viewer_scopes = viewer_scopes
+
+    def resolve(self, request, kwargs):
+        """Return tag and modification time, computed once per request."""
+        if not hasattr(request, "_validators"):
+            request._validators = self.compute(request, kwargs)
+        return request._validators
+
+    def content_scopes(self, request, kwargs):
+        """Return scopes of page content, looked up once per request."""
+        if not hasattr(request, "_content_scopes"):
+            request._content_scopes = self.scopes(request, **kwargs)
+        return request._content_scopes
+
+    def compute(self, request, kwargs):
+        scopes = self.content_scopes(request, kwargs)
+        if scopes is None:
+            return None, None
+        user_id = request.user.pk or 0
+        if user_id and self.viewer_scopes is not None:
+            scopes = scopes + self.viewer_scopes(user_id)
+        tag = cache.etag(
+            self.prefix,
+            request.get_full_path(),
+            user_id,
+            # Forms of page keep CSRF token of the cookie they were made for
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+            if user_id
+            else "",
+            *cache.generations(*scopes),
+        )
+        if user_id:
+            return tag, None
+        modified = cache.modified(*scopes)
+        if time.time() - modified < 1:
+            # HTTP date has one second resolution, one more change in the
+            # same second would look unmodified
+            return tag, None
+        return tag, datetime.fromtimestamp(modified, timezone.utc)
+
+    def etag(self, request, *args, **kwargs):
+        return self.resolve(request, kwargs)[0]
+
+    def last_modified(self, request, *args, **kwargs):
+        return self.resolve(request, kwargs)[1]
+
+    def __call__(self, view):
+        return condition(self.etag, self.last_modified)(view)
@@ -0,0 +1,81 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, UserStats
+
+
+def count_subquery(queryset, field):
+    """Correlated ``COUNT(*)`` of queryset rows pointing to outer row."""
+    counted = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counted), 0)
+
+
+def count_user_stats(user_id) -> dict:
+    """Exact counters of user computed from source tables."""
+    return {
+        "post_count": Post.objects.filter(author_id=user_id).count(),
+        "follower_count": Follow.objects.filter(author_id=user_id).count(),
+        "following_count": Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def recount_user_stats(user_id) -> UserStats:
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id, defaults=count_user_stats(user_id)
+    )
+    return stats
+
+
+def get_user_stats(user) -> UserStats:
+    """Return user's counters, creating missing row from exact counts."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        user.stats = recount_user_stats(user.pk)
+        return user.stats
+
+
+def changed(name, delta):
+    """Counter plus delta, never below zero.
+
+    Counters drift when rows bypass signals (``loaddata``,
+    ``bulk_create``), decrement of drifted zero must not break the
+    write, ``reconcile_counters`` repairs the value later.
+    """
+    return Greatest(F(name) + delta, 0)
+
+
+def change_user_stats(user_id, **deltas):
+    """Atomically add deltas to user's counters.
+
+    Missing row is left alone: it's computed from exact counts on first
+    read, and it may be missing because user is being deleted right now.
+    """
+    updates = {name: changed(name, delta) for name, delta in deltas.items()}
+    UserStats.objects.filter(user_id=user_id).update(**updates)
+
+
+def change_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=changed("comment_count", delta)
+    )
+
+
+def actual_comment_counts():
+    return Post.objects.annotate(
+        actual_count=count_subquery(Comment.objects.all(), "post")
+    )
+
+
+def actual_user_stats(users):
+    return users.annotate(
+        actual_post_count=count_subquery(Post.objects.all(), "author"),
+        actual_follower_count=count_subquery(Follow.objects.all(), "author"),
+        actual_following_count=count_subquery(Follow.objects.all(), "user"),
+    )
@@ -0,0 +1,67 @@
+from itertools import islice
+
+from django.conf import settings
+
+from .models import FeedItem, Follow, Post
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def fan_out_post(post):
+    """Add new post to feeds of all author's followers.
+
+    Followers are streamed and written in chunks, so authors with huge
+    audience don't load all follower ids or build one giant INSERT.
+    """
+    followers = (
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list("user_id", flat=True)
+        .iterator(chunk_size=settings.FEED_FANOUT_CHUNK)
+    )
+    for chunk in _chunks(followers, settings.FEED_FANOUT_CHUNK):
+        FeedItem.objects.bulk_create(
+            (
+                FeedItem(
+                    user_id=user_id,
+                    post_id=post.pk,
+                    author_id=post.author_id,
+                    pub_date=post.pub_date,
+                )
+                for user_id in chunk
+            ),
+            ignore_conflicts=True,
+        )
+
+
+def backfill(user_id, author_id):
+    """Copy all author's posts into user's feed after follow."""
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by()
+        .values_list("pk", "pub_date")
+        .iterator(chunk_size=settings.FEED_FANOUT_CHUNK)
+    )
+    for chunk in _chunks(posts, settings.FEED_FANOUT_CHUNK):
+        FeedItem.objects.bulk_create(
+            (
+                FeedItem(
+                    user_id=user_id,
+                    post_id=post_id,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for post_id, pub_date in chunk
+            ),
+            ignore_conflicts=True,
+        )
+
+
+def prune(user_id, author_id):
+    """Remove author's posts from user's feed after unfollow."""
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+
+from . import cache, counters, feed
+from .models import Follow
+
+
+def followed(user_id, author_id):
+    """Counters, follower's feed and its cached pages after follow."""
+    counters.change_user_stats(author_id, follower_count=1)
+    counters.change_user_stats(user_id, following_count=1)
+    feed.backfill(user_id, author_id)
+    cache.bump_generation("follow", user_id)
+    cache.bump_generation("stats", author_id)
+    cache.bump_generation("stats", user_id)
+
+
+def unfollowed(user_id, author_id):
+    """Counters, follower's feed and its cached pages after unfollow."""
+    counters.change_user_stats(author_id, follower_count=-1)
+    counters.change_user_stats(user_id, following_count=-1)
+    feed.prune(user_id, author_id)
+    cache.bump_generation("follow", user_id)
+    cache.bump_generation("stats", author_id)
+    cache.bump_generation("stats", user_id)
+
+
+def follow(user, author) -> bool:
+    """Follow author with one INSERT, return whether follow is new.
+
+    Repeated or concurrent call hits ``unique_follow`` and changes
+    nothing, side effects run once in ``post_save`` of created row.
+    """
+    if user.pk == author.pk:
+        return False
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unfollow(user, author) -> bool:
+    """Unfollow author, return whether follow existed.
+
+    Side effects run in ``post_delete`` of deleted row, counters never
+    go below zero if concurrent request deletes the same row.
+    """
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    return bool(deleted)
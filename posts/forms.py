@@ -1,5 +1,8 @@
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.forms.widgets import Textarea
+from django.template.defaultfilters import filesizeformat
 from django.utils.translation import gettext_lazy as _
 
 from .models import Comment, Post
@@ -22,6 +25,38 @@ class PostForm(forms.ModelForm):
             "group": _("Необходимо выбрать из списка, или оставить пустым"),
         }
 
+    def clean_image(self):
+        """Image header is enough to reject decompression bombs."""
+        image = self.cleaned_data.get("image")
+        size = getattr(getattr(image, "image", None), "size", None)
+        if size and size[0] * size[1] > settings.IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                _("Слишком большое изображение: %(width)s×%(height)s"),
+                code="too_many_pixels",
+                params={"width": size[0], "height": size[1]},
+            )
+        return image
+
+    def clean(self):
+        upload = self.files.get(self.add_prefix("image"))
+        if upload is not None and upload.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+            # Tail of upload was dropped, other errors of image are caused
+            # by that, so only the real reason is shown
+            self.errors.pop("image", None)
+            self.add_error(
+                "image",
+                ValidationError(
+                    _("Файл больше %(limit)s"),
+                    code="too_large",
+                    params={
+                        "limit": filesizeformat(
+                            settings.IMAGE_MAX_UPLOAD_SIZE
+                        )
+                    },
+                ),
+            )
+        return super().clean()
+
 
 class CommentForm(forms.ModelForm):
     """Form based on Comment model for create comment for post."""
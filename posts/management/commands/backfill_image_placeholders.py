@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from posts import cache, thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Store size and blurred placeholder of post images uploaded "
+        "before they were computed on upload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Posts read from database at once.",
+        )
+
+    def handle(self, *args, **options):
+        with_images = Post.objects.exclude(image="").exclude(image=None)
+        posts = with_images.filter(image_placeholder="")
+        done = failed = last_pk = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "image")[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            updated, errors = self.backfill(batch)
+            done += updated
+            failed += errors
+        if done:
+            cache.invalidate_posts(with_images)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled {done} posts, {failed} images failed."
+            )
+        )
+
+    def backfill(self, batch):
+        """Describe each distinct image of batch once, return counts."""
+        images = {}
+        for pk, name in batch:
+            images.setdefault(name, []).append(pk)
+        updated = failed = 0
+        for name, pks in images.items():
+            try:
+                described = thumbnails.describe_image(Post(image=name).image)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f"{name}: {type(error).__name__}: {error}")
+                continue
+            # Image may be replaced meanwhile, then its upload fills it
+            updated += Post.objects.filter(pk__in=pks, image=name).update(
+                **described
+            )
+        return updated, failed
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "filebased": "django.core.cache.backends.filebased.FileBasedCache",
+    "sqlite": "yatube.cache_backends.SQLiteCache",
+}
+
+
+def make_cache(name, directory, max_entries):
+    location = {
+        "locmem": f"benchmark-{name}",
+        "filebased": os.path.join(directory, "filebased"),
+        "sqlite": os.path.join(directory, "cache.sqlite3"),
+    }[name]
+    params = {"TIMEOUT": None, "OPTIONS": {"MAX_ENTRIES": max_entries}}
+    return import_string(BACKENDS[name])(location, params)
+
+
+def worker(name, directory, options, index, barrier, results):
+    """Write own share of keys, then run mixed load over all keys.
+
+    Hit ratio shows whether value written by one process is visible in
+    others, as it must be for cached fragments and invalidations.
+    """
+    if not apps.ready:
+        django.setup()
+    processes, keys = options["processes"], options["keys"]
+    cache = make_cache(name, directory, keys * 2)
+    payload = "x" * options["value_size"]
+    for key in range(index, keys, processes):
+        cache.set(f"key:{key}", payload)
+    barrier.wait()
+    rng = random.Random(index)
+    hits = reads = 0
+    started = time.perf_counter()
+    for _ in range(options["operations"]):
+        key = f"key:{rng.randrange(keys)}"
+        if rng.random() < options["write_ratio"]:
+            cache.set(key, payload)
+            continue
+        reads += 1
+        hits += cache.get(key) is not None
+    results.put((time.perf_counter() - started, hits, reads))
+
+
+class Command(BaseCommand):
+    help = "Compare cache backends under load of several processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--operations", type=int, default=5000)
+        parser.add_argument("--keys", type=int, default=500)
+        parser.add_argument("--value-size", type=int, default=2048)
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument(
+            "--backend",
+            action="append",
+            choices=sorted(BACKENDS),
+            help="Backend to measure, all by default.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'backend':<10} {'ops/s':>10} {'hit ratio':>10} "
+            f"({options['processes']} processes, "
+            f"{options['operations']} operations each)"
+        )
+        for name in options["backend"] or BACKENDS:
+            with tempfile.TemporaryDirectory() as directory:
+                ops, hit_ratio = self.run(name, directory, options)
+            self.stdout.write(f"{name:<10} {ops:>10.0f} {hit_ratio:>10.1%}")
+
+    def run(self, name, directory, options):
+        processes = options["processes"]
+        barrier = multiprocessing.Barrier(processes)
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=worker,
+                args=(name, directory, options, index, barrier, results),
+            )
+            for index in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        measured = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+        elapsed = max(seconds for seconds, _, _ in measured)
+        hits = sum(hits for _, hits, _ in measured)
+        reads = sum(reads for _, _, reads in measured)
+        ops = options["operations"] * processes / elapsed
+        return ops, hits / reads if reads else 0
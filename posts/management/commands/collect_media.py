@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from posts.media import collect_garbage
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Delete post images and thumbnails no post refers to."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=settings.MEDIA_GC_GRACE,
+            help="Seconds file must stay unused before it is deleted.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list files which would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        directory = Post._meta.get_field("image").upload_to
+        deleted = freed = 0
+        for name, size in collect_garbage(
+            directory, options["grace"], options["dry_run"]
+        ):
+            if options["verbosity"] > 1 or options["dry_run"]:
+                self.stdout.write(name)
+            deleted += 1
+            freed += size
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {deleted} files, {filesizeformat(freed)}."
+            )
+        )
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Rank authors to follow for every user by friends of friends and "
+        "co-follows. Run periodically, pages only read stored results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=settings.FOLLOW_SUGGESTIONS_TOP,
+            help="Suggestions stored per user.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Users whose suggestions are replaced in one transaction.",
+        )
+        parser.add_argument(
+            "--max-degree",
+            type=int,
+            default=settings.FOLLOW_SUGGESTIONS_MAX_DEGREE,
+            help="Followers or follows of one author looked at.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        graph, stored = suggestions.compute(
+            options["top"], options["batch_size"], options["max_degree"]
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {stored} suggestions for {len(graph)} users "
+                f"from {graph.edges} follows ({graph.nbytes} bytes "
+                f"snapshot) in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,54 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import TABLES, Export, parse_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream groups, posts, comments and follows as NDJSON, one row "
+        "per line. Memory doesn't grow with tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            default="",
+            help=f"Comma separated tables of {', '.join(TABLES)}, all "
+            "by default.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write, standard output by default.",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress output with gzip."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help="Rows fetched from database at once.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tables = parse_tables(options["tables"])
+        except ValueError as error:
+            raise CommandError(error)
+        stream = Export(tables, options["gzip"], options["chunk_size"])
+        if options["output"] == "-":
+            self.write(stream, sys.stdout.buffer)
+            # Dump takes standard output, report goes to errors stream
+            self.stderr.write(stream.report())
+        else:
+            with open(options["output"], "wb") as output:
+                self.write(stream, output)
+            self.stdout.write(self.style.SUCCESS(stream.report()))
+
+    def write(self, stream, output):
+        for chunk in stream:
+            output.write(chunk)
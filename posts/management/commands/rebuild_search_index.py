@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild inverted search index of posts from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Index rows written per INSERT batch.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        indexed = 0
+        with transaction.atomic():
+            for indexed in rebuild_index(options["batch_size"]):
+                self.stdout.write(f"Indexed {indexed} posts", ending="\r")
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed} posts in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts.counters import actual_comment_counts, actual_user_stats
+from posts.models import Post, UserStats
+
+User = get_user_model()
+
+STATS_FIELDS = ("post_count", "follower_count", "following_count")
+
+
+class Command(BaseCommand):
+    help = "Recount denormalized posts, comments and follows counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows written per UPDATE/INSERT batch.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = self.reconcile_posts(batch_size)
+        users = self.reconcile_users(batch_size)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fixed comment counters of {posts} posts "
+                f"and stats of {users} users."
+            )
+        )
+
+    def reconcile_posts(self, batch_size) -> int:
+        drifted = (
+            actual_comment_counts()
+            .exclude(comment_count=F("actual_count"))
+            .only("pk", "comment_count")
+        )
+        fixed = []
+        for post in drifted.iterator(chunk_size=batch_size):
+            post.comment_count = post.actual_count
+            fixed.append(post)
+        Post.objects.bulk_update(
+            fixed, ["comment_count"], batch_size=batch_size
+        )
+        return len(fixed)
+
+    def reconcile_users(self, batch_size) -> int:
+        users = actual_user_stats(User.objects.select_related("stats"))
+        drifted = users.filter(
+            Q(stats__isnull=True)
+            | ~Q(stats__post_count=F("actual_post_count"))
+            | ~Q(stats__follower_count=F("actual_follower_count"))
+            | ~Q(stats__following_count=F("actual_following_count"))
+        )
+        missing, changed = [], []
+        for user in drifted.iterator(chunk_size=batch_size):
+            actual = {
+                name: getattr(user, f"actual_{name}") for name in STATS_FIELDS
+            }
+            try:
+                stats = user.stats
+            except UserStats.DoesNotExist:
+                missing.append(UserStats(user_id=user.pk, **actual))
+                continue
+            for name, value in actual.items():
+                setattr(stats, name, value)
+            changed.append(stats)
+        UserStats.objects.bulk_create(missing, batch_size=batch_size)
+        UserStats.objects.bulk_update(
+            changed, STATS_FIELDS, batch_size=batch_size
+        )
+        return len(missing) + len(changed)
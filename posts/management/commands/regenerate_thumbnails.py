@@ -0,0 +1,183 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import cache, thumbnails
+from posts.models import Post
+
+
+def setup_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def regenerate(task):
+    """Render every variant of one image and finish its pending posts.
+
+    Posts whose thumbnails were never marked ready go through the whole
+    upload pipeline, other posts only need the files.
+    """
+    name, pending = task
+    try:
+        thumbnails.render_thumbnails(Post(image=name).image)
+        for post_id in pending:
+            thumbnails.render_post(post_id, name)
+    except Exception as error:
+        return name, f"{type(error).__name__}: {error}"
+    return name, None
+
+
+def batches(posts, last_pk, size):
+    """Yield ``(pk, image, ready)`` of posts after ``last_pk`` in batches."""
+    while True:
+        batch = list(
+            posts.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "image", "thumbnails_ready")[:size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def settings_signature() -> str:
+    """Checkpoint is valid only for the same set of thumbnails."""
+    raw = json.dumps(
+        [
+            settings.THUMBNAIL_GEOMETRIES,
+            settings.THUMBNAIL_WIDTHS,
+            settings.THUMBNAIL_FORMATS,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        "Render thumbnails of all post images on a pool of processes. "
+        "Pages keep showing old thumbnails until the run is finished."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Worker processes, 0 renders in this process.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Posts read from database and checkpointed at once.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(
+                tempfile.gettempdir(), "yatube_regenerate_thumbnails.json"
+            ),
+            help="File with id of the last post before any failure.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore checkpoint and start from the first post.",
+        )
+
+    def handle(self, *args, **options):
+        self.checkpoint = options["checkpoint"]
+        signature = settings_signature()
+        last_pk = 0 if options["restart"] else self.load(signature)
+        if last_pk:
+            self.stdout.write(f"Resuming after post {last_pk}")
+        posts = Post.objects.exclude(image="").exclude(image=None)
+        total = posts.filter(pk__gt=last_pk).count()
+        pool = None
+        if options["processes"]:
+            # Forked workers open their own connections. Batches are read
+            # by keyset, so no cursor stays open while workers write.
+            connections.close_all()
+            pool = multiprocessing.Pool(
+                options["processes"], initializer=setup_worker
+            )
+        self.save(signature, last_pk)
+        started = time.monotonic()
+        done = images = failed = 0
+        try:
+            for batch in batches(posts, last_pk, options["batch_size"]):
+                rendered, errors = self.render(pool, batch)
+                images += rendered
+                failed += errors
+                done += len(batch)
+                # Rerun starts again from the first batch that failed
+                if not failed:
+                    self.save(signature, batch[-1][0])
+                rate = images / (time.monotonic() - started)
+                self.stdout.write(
+                    f"{done}/{total} posts, {images} images, "
+                    f"{rate:.1f} images/s",
+                    ending="\r",
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        # Cached pages switch to new thumbnails all at once
+        cache.invalidate_posts(posts)
+        if not failed and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        elapsed = time.monotonic() - started
+        rate = images / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {images} images of {done} posts "
+                f"in {elapsed:.1f}s ({rate:.1f} images/s), "
+                f"{failed} failed."
+            )
+        )
+
+    def render(self, pool, batch):
+        """Render each distinct image of batch once, return counts."""
+        tasks = {}
+        for pk, name, ready in batch:
+            pending = tasks.setdefault(name, [])
+            if not ready:
+                pending.append(pk)
+        if pool is None:
+            results = map(regenerate, tasks.items())
+        else:
+            results = pool.imap_unordered(regenerate, tasks.items())
+        failed = 0
+        for name, error in results:
+            if error:
+                failed += 1
+                self.stderr.write(f"{name}: {error}")
+        return len(tasks), failed
+
+    def load(self, signature) -> int:
+        try:
+            with open(self.checkpoint) as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return 0
+        if saved.get("signature") != signature:
+            self.stdout.write("Thumbnail settings changed, starting over")
+            return 0
+        return saved.get("last_pk", 0)
+
+    def save(self, signature, last_pk):
+        temporary = f"{self.checkpoint}.tmp"
+        with open(temporary, "w") as file:
+            json.dump({"signature": signature, "last_pk": last_pk}, file)
+        os.replace(temporary, self.checkpoint)
@@ -0,0 +1,120 @@
+import posixpath
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from .models import MediaBlob, Post
+
+
+def _storage():
+    return Post._meta.get_field("image").storage
+
+
+def add_reference(name):
+    """Count one more post using the file."""
+    blobs = MediaBlob.objects.filter(name=name)
+    if blobs.update(ref_count=F("ref_count") + 1, updated=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, ref_count=1)
+    except IntegrityError:
+        blobs.update(ref_count=F("ref_count") + 1, updated=timezone.now())
+
+
+def drop_reference(name):
+    """Count one post less using the file, file itself is kept."""
+    MediaBlob.objects.filter(name=name, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated=timezone.now()
+    )
+
+
+def replace_reference(old, new):
+    """Post image is changed from ``old`` to ``new``, both may be empty."""
+    if old == new:
+        return
+    if new:
+        add_reference(new)
+    if old:
+        drop_reference(old)
+
+
+def delete_blob(name):
+    """Delete file together with its thumbnails and their records."""
+    delete(ImageFile(name, _storage()))
+
+
+def _is_stale(name, cutoff) -> bool:
+    """File wasn't written or reused by upload since cutoff."""
+    return _storage().get_modified_time(name) < cutoff
+
+
+def unused_blobs(grace):
+    """Names of blobs without references for longer than grace seconds.
+
+    Counters may drift, so posts table has the final say: blob which is
+    still used gets its counter fixed instead.
+    """
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    candidates = list(
+        MediaBlob.objects.filter(ref_count=0, updated__lt=cutoff).values_list(
+            "name", flat=True
+        )
+    )
+    for name in candidates:
+        used = Post.objects.filter(image=name).count()
+        if used:
+            MediaBlob.objects.filter(name=name).update(ref_count=used)
+        elif not _storage().exists(name) or _is_stale(name, cutoff):
+            yield name
+
+
+def _walk(directory):
+    storage = _storage()
+    directories, files = storage.listdir(directory)
+    yield directory, files
+    for name in directories:
+        yield from _walk(posixpath.join(directory, name))
+
+
+def unknown_files(directory, grace):
+    """Stored files which are neither counted nor used by any post.
+
+    These are left by uploads whose transaction was rolled back.
+    """
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    for path, files in _walk(directory):
+        names = {posixpath.join(path, name) for name in files}
+        known = set(
+            MediaBlob.objects.filter(name__in=names).values_list(
+                "name", flat=True
+            )
+        )
+        known.update(
+            Post.objects.filter(image__in=names).values_list(
+                "image", flat=True
+            )
+        )
+        for name in sorted(names - known):
+            if _is_stale(name, cutoff):
+                yield name
+
+
+def collect_garbage(directory, grace, dry_run=False):
+    """Delete unused blobs and unknown files, yield name and size."""
+    storage = _storage()
+    for name in unused_blobs(grace):
+        size = storage.size(name) if storage.exists(name) else 0
+        if not dry_run:
+            delete_blob(name)
+            MediaBlob.objects.filter(name=name, ref_count=0).delete()
+        yield name, size
+    for name in unknown_files(directory, grace):
+        size = storage.size(name)
+        if not dry_run:
+            delete_blob(name)
+        yield name, size
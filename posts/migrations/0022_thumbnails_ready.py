@@ -0,0 +1,27 @@
+# Generated by Django 3.1.14 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    """Old images were rendered on demand and keep working the same way."""
+    Post = apps.get_model("posts", "Post")
+    Post.objects.exclude(image="").exclude(image=None).update(
+        thumbnails_ready=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Миниатюры готовы'),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.1.14 on 2026-10-18 19:18
+
+from django.db import migrations, models
+from django.db.models import Count
+import posts.storage
+
+
+def count_references(apps, schema_editor):
+    """Files of existing posts keep their names and get counters."""
+    MediaBlob = apps.get_model("posts", "MediaBlob")
+    Post = apps.get_model("posts", "Post")
+    used = (
+        Post.objects.exclude(image="")
+        .exclude(image=None)
+        .order_by()
+        .values("image")
+        .annotate(ref_count=Count("pk"))
+    )
+    MediaBlob.objects.bulk_create(
+        MediaBlob(name=row["image"], ref_count=row["ref_count"])
+        for row in used.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Изменен')),
+            ],
+            options={
+                'verbose_name': 'Media blob',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/'),
+        ),
+        migrations.AddIndex(
+            model_name='mediablob',
+            index=models.Index(fields=['ref_count', 'updated'], name='blob_unused_idx'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.1.14 on 2026-10-18 19:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def root_existing_comments(apps, schema_editor):
+    """Comments written before threads are top-level ones."""
+    Comment = apps.get_model("posts", "Comment")
+    comments = []
+    for comment in Comment.objects.only("pk").iterator(chunk_size=1000):
+        comment.path = f"{comment.pk:010d}"
+        comments.append(comment)
+    Comment.objects.bulk_update(comments, ["path"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_image_placeholders'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_post_created_idx',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Thread depth'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.comment', verbose_name='Reply to'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(editable=False, max_length=255, null=True, unique=True, verbose_name='Thread path'),
+        ),
+        migrations.RunPython(
+            root_existing_comments, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'path'], name='comment_thread_idx'),
+        ),
+    ]
@@ -1,10 +1,19 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.db.models.fields.related import ForeignKey
 from django.template.defaultfilters import truncatechars
 
+from .storage import post_image_storage
+
 User = get_user_model()
 
+# Comment path is ids of its ancestors and its own, zero-padded to this
+# width, so string order of paths is display order of threads
+PATH_STEP = 10
+# Sorts right after digits, ``path < prefix + PATH_END`` bounds subtree
+PATH_END = ":"
+
 
 class Group(models.Model):
     """Model of groups all posts.
@@ -26,6 +35,33 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Posts ready for rendering cards without extra queries.
+
+        Author and group are joined, comments count is stored in
+        ``comment_count`` column. ``id`` makes ordering unique.
+        """
+        return self.select_related("author", "group").order_by(
+            "-pub_date", "-id"
+        )
+
+    def follow_feed(self, user):
+        """Feed of authors user follows, read from materialized feed.
+
+        Sorted by ``FeedItem`` columns to read its index in order.
+        """
+        return (
+            self.feed()
+            .filter(feed_items__user=user)
+            .annotate(
+                feed_pub_date=models.F("feed_items__pub_date"),
+                feed_post_id=models.F("feed_items__post_id"),
+            )
+            .order_by("-feed_pub_date", "-feed_post_id")
+        )
+
+
 class Post(models.Model):
     """Model for posts user writed.
 
@@ -35,6 +71,11 @@ class Post(models.Model):
         author [ForeignKey(User)]: user writed posts
         group [ForeignKey(Group)]: group posts
         image [ImageFiel]: image
+        comment_count [PositiveIntegerField]: denormalized comments count
+        thumbnails_ready [BooleanField]: thumbnails of image are rendered
+        image_width [PositiveIntegerField]: width of upright image
+        image_height [PositiveIntegerField]: height of upright image
+        image_placeholder [TextField]: tiny blurred image as data URI
 
 
     Posts default ordering by desc pub_date field
@@ -58,13 +99,44 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to="posts/",
+        storage=post_image_storage,
         blank=True,
         null=True,
     )
+    comment_count = models.PositiveIntegerField(
+        "Комментариев", default=0, editable=False
+    )
+    thumbnails_ready = models.BooleanField(
+        "Миниатюры готовы", default=False, editable=False
+    )
+    image_width = models.PositiveIntegerField(
+        "Ширина картинки", null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        "Высота картинки", null=True, editable=False
+    )
+    image_placeholder = models.TextField(
+        "Заглушка картинки", blank=True, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "Post"
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -74,14 +146,50 @@ class Post(models.Model):
         )
 
 
+class CommentManager(models.Manager):
+    def subtree(self, path):
+        """Comment with ``path`` and all its replies in display order."""
+        return (
+            self.select_related("author")
+            .filter(path__gte=path, path__lt=path + PATH_END)
+            .order_by("path")
+        )
+
+    def threads(self, roots):
+        """Top-level ``roots`` of one post with all their replies.
+
+        Roots must be consecutive in path order, like a keyset page, then
+        their threads are one range of ``path`` read in a single query.
+        Threads are returned flat, in the order of ``roots``.
+        """
+        roots = list(roots)
+        if not roots:
+            return []
+        paths = sorted(root.path for root in roots)
+        comments = self.select_related("author").filter(
+            post_id=roots[0].post_id,
+            path__gte=paths[0],
+            path__lt=paths[-1] + PATH_END,
+        ).order_by("path")
+        threads = {}
+        for comment in comments:
+            threads.setdefault(comment.path[:PATH_STEP], []).append(comment)
+        return [
+            comment for root in roots for comment in threads.get(root.path, [])
+        ]
+
+
 class Comment(models.Model):
-    """Comment for some post.
+    """Comment for some post or reply to another comment.
 
     Fields:
         posts (ForeignKey): Bounded post
         author (ForeignKey): Comment's author
         text (TextField): Comment's text
         created (DatetimeField): auto created date and time post's creation
+        parent (ForeignKey): Comment this one replies to
+        path (CharField): Materialized path, ids from thread root to self
+        depth (PositiveSmallIntegerField): 0 for top-level comment
     """
 
     post = models.ForeignKey(
@@ -98,13 +206,61 @@ class Comment(models.Model):
     )
     text = models.TextField("Comment's text")
     created = models.DateTimeField("Date post was created", auto_now_add=True)
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        related_name="replies",
+        blank=True,
+        null=True,
+        verbose_name="Reply to",
+    )
+    path = models.CharField(
+        "Thread path", max_length=255, unique=True, null=True, editable=False
+    )
+    depth = models.PositiveSmallIntegerField(
+        "Thread depth", default=0, editable=False
+    )
+
+    objects = CommentManager()
 
     class Meta:
         verbose_name = "Comments"
+        indexes = [
+            models.Index(
+                fields=["post", "path"], name="comment_post_path_idx"
+            ),
+            models.Index(
+                fields=["post", "depth", "path"], name="comment_thread_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.author}'s comment to {self.post}"
 
+    def save(self, *args, **kwargs):
+        """Place new comment into its thread.
+
+        Reply deeper than ``COMMENT_MAX_DEPTH`` goes to the ancestor at
+        the last allowed level. Path needs own id, so it is written right
+        after insert in the same transaction.
+        """
+        if self.path:
+            return super().save(*args, **kwargs)
+        prefix = ""
+        if self.parent_id:
+            if self.parent.depth >= settings.COMMENT_MAX_DEPTH:
+                ancestor = self.parent.path[
+                    : settings.COMMENT_MAX_DEPTH * PATH_STEP
+                ]
+                self.parent = Comment.objects.get(path=ancestor)
+            self.post_id = self.parent.post_id
+            self.depth = self.parent.depth + 1
+            prefix = self.parent.path
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            self.path = f"{prefix}{self.pk:0{PATH_STEP}d}"
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(models.Model):
     """User can follow author."""
@@ -129,6 +285,198 @@ class Follow(models.Model):
                 fields=["user", "author"], name="unique_follow"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} follow {self.author}"
+
+
+class UserStats(models.Model):
+    """Denormalized counters shown on author's card.
+
+    Counters are changed with atomic F() updates by signals and can be
+    fixed with ``manage.py reconcile_counters``.
+
+    Fields:
+        user [OneToOneField(User)]: counted user, primary key
+        post_count [PositiveIntegerField]: posts written by user
+        follower_count [PositiveIntegerField]: users following user
+        following_count [PositiveIntegerField]: authors user follows
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="user",
+    )
+    post_count = models.PositiveIntegerField("Записей", default=0)
+    follower_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписан", default=0)
+
+    class Meta:
+        verbose_name = "User stats"
+
+    def __str__(self) -> str:
+        return f"{self.user} stats"
+
+
+class FollowSuggestion(models.Model):
+    """Author suggested to user, stored by ``compute_follow_suggestions``.
+
+    Fields:
+        user [ForeignKey(User)]: user who gets suggestion
+        author [ForeignKey(User)]: suggested author
+        score [PositiveIntegerField]: strength of suggestion
+        computed [DateTimeField]: start of job run which stored it
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+        verbose_name="user",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="suggested author",
+    )
+    score = models.PositiveIntegerField("Score")
+    computed = models.DateTimeField("Computed", db_index=True)
+
+    class Meta:
+        verbose_name = "Follow suggestion"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_follow_suggestion"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-score", "author"],
+                name="suggestion_user_score_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.author} suggested to {self.user}"
+
+
+class FeedItem(models.Model):
+    """Materialized follow feed: one row per follower and post.
+
+    Rows are written when author publishes post and when user follows
+    author, so follow page reads user's range of index without join
+    through Follow.
+
+    Fields:
+        user [ForeignKey(User)]: feed owner, follower of post's author
+        post [ForeignKey(Post)]: post shown in feed
+        author [ForeignKey(User)]: post's author, used to prune on unfollow
+        pub_date [DateTimeField]: copy of post's pub_date for ordering
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_items",
+        verbose_name="feed owner",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="feed_items",
+        verbose_name="feed post",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="post's author",
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        verbose_name = "Feed item"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_feed_item"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="feed_user_pub_date_idx",
+            ),
+            models.Index(
+                fields=["user", "author"], name="feed_user_author_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.post} in {self.user}'s feed"
+
+
+class SearchTerm(models.Model):
+    """Inverted index of posts text: one row per word and post.
+
+    Fields:
+        term [CharField]: normalized word
+        post [ForeignKey(Post)]: post containing the word
+        frequency [PositiveIntegerField]: times word is used in post
+    """
+
+    term = models.CharField("Слово", max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+        verbose_name="indexed post",
+    )
+    frequency = models.PositiveIntegerField("Частота", default=1)
+
+    class Meta:
+        verbose_name = "Search term"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["term", "post"], name="unique_search_term"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.term} in post {self.post_id}"
+
+
+class MediaBlob(models.Model):
+    """Reference count of content-addressed image file.
+
+    Posts with the same picture share one file. Counter is changed by
+    signals, ``manage.py collect_media`` deletes files nobody refers to.
+
+    Fields:
+        name [CharField]: file name in storage
+        ref_count [PositiveIntegerField]: posts using the file
+        updated [DateTimeField]: last change of ref_count
+    """
+
+    name = models.CharField("Файл", max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField("Ссылок", default=0)
+    updated = models.DateTimeField("Изменен", auto_now=True)
+
+    class Meta:
+        verbose_name = "Media blob"
+        indexes = [
+            models.Index(
+                fields=["ref_count", "updated"], name="blob_unused_idx"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} used {self.ref_count} times"
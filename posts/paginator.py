@@ -0,0 +1,250 @@
+import base64
+import binascii
+import json
+import math
+from collections.abc import Sequence
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+NEXT = "n"
+PREVIOUS = "p"
+# Integers of cursor must fit signed 64-bit database column
+MAX_INTEGER = 2 ** 63 - 1
+
+
+class InvalidCursor(Exception):
+    """Cursor token can't be decoded for this paginator."""
+
+
+class CursorPage(Sequence):
+    """One page of keyset pagination.
+
+    Unlike django Page it knows nothing about total count or page
+    numbers, only opaque tokens for neighbouring pages.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self) -> str:
+        return f"<CursorPage of {len(self)} objects>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset paginator over queryset ordered by unique set of fields.
+
+    Page is selected by ``WHERE (ordering) < (cursor values)`` instead
+    of ``OFFSET``, so page N costs the same as page 1 and no ``COUNT(*)``
+    is needed. Last field of ordering must be unique (usually ``id``).
+    Ordering may include annotations, e.g. search rank.
+    """
+
+    def __init__(self, object_list, per_page, ordering=("-pub_date", "-id")):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip("-") for name in self.ordering]
+
+    def _field(self, name):
+        """Model field of ordering or output field of annotation."""
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def encode_cursor(self, obj, direction=NEXT) -> str:
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps([direction, values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Return direction and python values stored in cursor."""
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding)
+            direction, values = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+            raise InvalidCursor(cursor)
+        if len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        if not all(map(self._is_scalar, values)):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError, OverflowError):
+            raise InvalidCursor(cursor)
+        if any(value is None for value in values):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    @staticmethod
+    def _is_scalar(value) -> bool:
+        """Cursor holds only strings and numbers database can compare."""
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, int):
+            return -MAX_INTEGER <= value <= MAX_INTEGER
+        if isinstance(value, float):
+            return math.isfinite(value)
+        return isinstance(value, str)
+
+    def _keyset_filter(self, values, reverse):
+        """Build lexicographic ``(f1, f2, ...) after (v1, v2, ...)``.
+
+        Expanded ``OR`` alone has no bound usable by index, so the first
+        field is also bounded inclusively and index is read as a range
+        starting at the cursor instead of being merged and sorted.
+        """
+        condition = Q()
+        lookups = []
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith("-")
+            lookup = "lt" if descending != reverse else "gt"
+            lookups.append(lookup)
+            field = name.lstrip("-")
+            equal = dict(zip(self.fields[:index], values[:index]))
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[index]})
+        bound = Q(**{f"{self.fields[0]}__{lookups[0]}e": values[0]})
+        return bound & condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith("-") else f"-{name}"
+            for name in self.ordering
+        ]
+
+    def page(self, cursor=None) -> CursorPage:
+        """Return page after (or before) the cursor, first page if None."""
+        direction, values = NEXT, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        reverse = direction == PREVIOUS
+        queryset = self.object_list.order_by(
+            *(self._reversed_ordering() if reverse else self.ordering)
+        )
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], NEXT)
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], PREVIOUS)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None) -> CursorPage:
+        """Return valid page, falling back to first page on bad cursor."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+class WindowedPage(Page):
+    """Page which renders only a window of page links."""
+
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator which doesn't run ``COUNT(*)`` on every request.
+
+    Count is taken from denormalized ``count`` when it is known, or from
+    ``COUNT(*)`` cached under ``count_key`` for ``PAGINATOR_COUNT_TTL``
+    seconds. Page is sliced by ``per_page`` rather than by count, so
+    stale count never cuts posts off a page, it only may hide newest
+    last page until cache expires.
+    """
+
+    ELLIPSIS = "…"
+
+    def __init__(self, object_list, per_page, count_key=None, count=None):
+        super().__init__(object_list, per_page)
+        self.count_key = count_key
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_key, count, settings.PAGINATOR_COUNT_TTL)
+        return count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Page numbers around current page and at both ends.
+
+        Gaps are filled with ``ELLIPSIS``, so list length doesn't depend
+        on amount of pages.
+        """
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        shown = set(range(1, on_ends + 1))
+        shown.update(range(number - on_each_side, number + on_each_side + 1))
+        shown.update(range(num_pages - on_ends + 1, num_pages + 1))
+        pages, previous = [], 0
+        for page in sorted(shown):
+            if not 1 <= page <= num_pages:
+                continue
+            if page - previous > 1:
+                pages.append(self.ELLIPSIS)
+            pages.append(page)
+            previous = page
+        return pages
@@ -0,0 +1,145 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from PIL import Image, ImageOps
+
+from .models import Post
+
+SIGNATURE_SALT = "posts.resize"
+SIGNATURE_LENGTH = 24
+CACHED_BYTES_KEY = "resize:cached_bytes"
+# Evicted down to this share of RESIZE_CACHE_MAX_BYTES, so eviction
+# doesn't run again on the very next write
+EVICT_TO = 0.9
+
+
+def sign(name, width, height) -> str:
+    """HMAC of variant, only URLs made by the site are served."""
+    value = f"{width}x{height}/{name}"
+    digest = salted_hmac(SIGNATURE_SALT, value).hexdigest()
+    return digest[:SIGNATURE_LENGTH]
+
+
+def check_signature(signature, name, width, height) -> bool:
+    return constant_time_compare(signature, sign(name, width, height))
+
+
+def resize_url(name, width, height) -> str:
+    return reverse(
+        "resize_image",
+        kwargs={
+            "signature": sign(name, width, height),
+            "width": width,
+            "height": height,
+            "name": name,
+        },
+    )
+
+
+def cache_path(name, width, height) -> str:
+    """File of variant in disk cache, sharded by hash prefix."""
+    digest = hashlib.sha256(f"{width}x{height}/{name}".encode()).hexdigest()
+    return os.path.join(
+        settings.RESIZE_CACHE_DIR, digest[:2], f"{digest}.jpg"
+    )
+
+
+def render(name, width, height) -> bytes:
+    """Crop source image to ``width``×``height`` around center as JPEG."""
+    storage = Post._meta.get_field("image").storage
+    with storage.open(name) as file, Image.open(file) as source:
+        if source.width * source.height > settings.IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image {name} has too many pixels")
+        image = ImageOps.exif_transpose(source).convert("RGB")
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    content = BytesIO()
+    image.save(content, "JPEG", quality=85, optimize=True)
+    return content.getvalue()
+
+
+def _write(path, content):
+    directory = os.path.dirname(path)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def get_variant(name, width, height) -> str:
+    """Return path of cached variant, rendering it at most once.
+
+    Concurrent requests for the same variant, from threads or processes,
+    wait on ``flock`` of its lock file and then read the result of the
+    first one.
+    """
+    path = cache_path(name, width, height)
+    if os.path.exists(path):
+        # Modification time drives LRU eviction, atime may be disabled
+        os.utime(path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(path):
+            content = render(name, width, height)
+            _write(path, content)
+            add_cached_bytes(len(content))
+    return path
+
+
+def add_cached_bytes(size):
+    """Count written bytes, evict old variants over the limit."""
+    cache.add(CACHED_BYTES_KEY, 0, None)
+    try:
+        total = cache.incr(CACHED_BYTES_KEY, size)
+    except ValueError:
+        total = size
+    if total > settings.RESIZE_CACHE_MAX_BYTES:
+        evict()
+
+
+def _cached_files():
+    """Yield modification time, size and path of every variant."""
+    for directory, _, names in os.walk(settings.RESIZE_CACHE_DIR):
+        for name in names:
+            if name.startswith(".") or name.endswith(".lock"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict():
+    """Delete least recently used variants until cache fits its limit."""
+    files = sorted(_cached_files())
+    total = sum(size for _, size, _ in files)
+    limit = settings.RESIZE_CACHE_MAX_BYTES * EVICT_TO
+    for _, size, path in files:
+        if total <= limit:
+            break
+        _remove(path)
+        _remove(f"{path}.lock")
+        total -= size
+    cache.set(CACHED_BYTES_KEY, total, None)
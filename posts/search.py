@@ -0,0 +1,98 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              Sum, Value, When)
+
+from .models import Post, SearchTerm
+
+WORD = re.compile(r"\w{2,}")
+TERM_LENGTH = SearchTerm._meta.get_field("term").max_length
+
+
+def tokenize(text):
+    """Normalized words of text in order of appearance."""
+    return [word[:TERM_LENGTH] for word in WORD.findall(text.lower())]
+
+
+def index_post(post):
+    """Replace post's rows in inverted index with its current words."""
+    SearchTerm.objects.filter(post_id=post.pk).delete()
+    frequencies = Counter(tokenize(post.text))
+    SearchTerm.objects.bulk_create(
+        SearchTerm(term=term, post_id=post.pk, frequency=frequency)
+        for term, frequency in frequencies.items()
+    )
+
+
+def no_results():
+    """Empty result which can still be ordered and paged by ``rank``."""
+    return Post.objects.none().annotate(
+        rank=Value(0.0, output_field=FloatField())
+    )
+
+
+def search(query):
+    """Posts containing every query word, ranked by relevance.
+
+    Rank is sum of word frequencies weighted by rarity of the word
+    (``1 / posts with word``), so rare words decide order. Result is
+    ordered by ``rank`` and ``id`` for keyset pagination.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[: settings.SEARCH_MAX_TERMS]
+    if not terms:
+        return no_results()
+    documents = dict(
+        SearchTerm.objects.filter(term__in=terms)
+        .values("term")
+        .annotate(documents=Count("post"))
+        .values_list("term", "documents")
+    )
+    if len(documents) < len(terms):
+        return no_results()
+    weight = Case(
+        *(
+            When(
+                search_terms__term=term,
+                then=Value(1.0 / documents[term], output_field=FloatField()),
+            )
+            for term in terms
+        ),
+        output_field=FloatField(),
+    )
+    return (
+        Post.objects.feed()
+        .filter(search_terms__term__in=terms)
+        .annotate(
+            rank=Sum(
+                ExpressionWrapper(
+                    F("search_terms__frequency") * weight,
+                    output_field=FloatField(),
+                )
+            ),
+            matched=Count("search_terms"),
+        )
+        .filter(matched=len(terms))
+        .order_by("-rank", "-id")
+    )
+
+
+def rebuild_index(batch_size):
+    """Index all posts from scratch, yield amount of indexed posts."""
+    SearchTerm.objects.all().delete()
+    posts = Post.objects.order_by().only("pk", "text")
+    batch, indexed = [], 0
+    for post in posts.iterator(chunk_size=batch_size):
+        frequencies = Counter(tokenize(post.text))
+        batch.extend(
+            SearchTerm(term=term, post_id=post.pk, frequency=frequency)
+            for term, frequency in frequencies.items()
+        )
+        indexed += 1
+        if len(batch) >= batch_size:
+            SearchTerm.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+            yield indexed
+    SearchTerm.objects.bulk_create(batch, batch_size=batch_size)
+    yield indexed
@@ -0,0 +1,176 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cache, counters, feed, follows, media, search, thumbnails
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+# Posts being deleted by this thread, their comments go by cascade and
+# need neither counter updates nor invalidation of their own
+_deleting = threading.local()
+
+
+def deleting_posts() -> set:
+    if not hasattr(_deleting, "posts"):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(post_save, sender=User)
+def user_create_stats(sender, instance, created, raw, **kwargs):
+    """New user starts with zero counters."""
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_count_created(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_user_stats(instance.author_id, post_count=1)
+        cache.change_post_count(1, instance.group_id)
+        return
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if previous_group_id != instance.group_id:
+        cache.change_post_count(-1, previous_group_id, index=False)
+        cache.change_post_count(1, instance.group_id, index=False)
+
+
+@receiver(post_delete, sender=Post)
+def post_count_deleted(sender, instance, **kwargs):
+    counters.change_user_stats(instance.author_id, post_count=-1)
+    cache.change_post_count(-1, instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_count_created(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_count_deleted(sender, instance, **kwargs):
+    if instance.post_id not in deleting_posts():
+        counters.change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw, **kwargs):
+    """Deliver new post to followers' materialized feeds."""
+    if created and not raw:
+        feed.fan_out_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_previous(sender, instance, raw, **kwargs):
+    """Edited post may leave its group, change text or image.
+
+    Old group must be invalidated too, search index is rebuilt only
+    when text is changed and thumbnails only when image is replaced.
+    """
+    instance._previous_group_id = instance._previous_text = None
+    instance._previous_image = None
+    if instance.pk and not raw:
+        previous = (
+            Post.objects.filter(pk=instance.pk)
+            .values("group_id", "text", "image")
+            .first()
+        )
+        if previous is not None:
+            instance._previous_group_id = previous["group_id"]
+            instance._previous_text = previous["text"]
+            instance._previous_image = previous["image"]
+            if previous["image"] != instance.image.name:
+                instance.thumbnails_ready = False
+                instance.image_width = instance.image_height = None
+                instance.image_placeholder = ""
+
+
+@receiver(post_save, sender=Post)
+def post_update_search_index(sender, instance, created, raw, **kwargs):
+    if not raw and instance.text != getattr(instance, "_previous_text", None):
+        search.index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_count_image_reference(sender, instance, raw, **kwargs):
+    """Shared image file is kept while any post refers to it."""
+    if not raw:
+        media.replace_reference(
+            getattr(instance, "_previous_image", None), instance.image.name
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_drop_image_reference(sender, instance, **kwargs):
+    if instance.image:
+        media.drop_reference(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def post_schedule_thumbnails(sender, instance, raw, **kwargs):
+    """Render thumbnails of new image out of request."""
+    if not raw and instance.image and not instance.thumbnails_ready:
+        thumbnails.schedule(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def post_mark_deleting(sender, instance, **kwargs):
+    """Post invalidates its pages once, not for every cascaded comment."""
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_unmark_deleting(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_invalidate_cache(sender, instance, **kwargs):
+    """Changed post must show up in cached pages and follow feeds."""
+    cache.bump_post_generations(instance.author_id, instance.group_id)
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if previous_group_id not in (None, instance.group_id):
+        cache.bump_generation("group", previous_group_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_invalidate_cache(sender, instance, **kwargs):
+    """Comments count on post card is a part of cached pages."""
+    if instance.post_id in deleting_posts():
+        return
+    post = (
+        Post.objects.filter(pk=instance.post_id)
+        .values("author_id", "group_id")
+        .first()
+    )
+    if post is not None:
+        cache.bump_post_generations(post["author_id"], post["group_id"])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_invalidate_cache(sender, instance, **kwargs):
+    """Group is rendered on cards of its posts everywhere."""
+    cache.invalidate_group(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw, **kwargs):
+    """Count follow and fill follower's feed with author's posts."""
+    if created and not raw:
+        follows.followed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Uncount follow and drop author's posts from follower's feed."""
+    follows.unfollowed(instance.user_id, instance.author_id)
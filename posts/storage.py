@@ -0,0 +1,71 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by SHA-256 of their content.
+
+    ``posts/photo.JPG`` with content hash ``ab12...`` is stored as
+    ``posts/ab/12/ab12....jpg``, two levels of hash prefix keep
+    directories small. Saving the same content again writes nothing and
+    returns existing name, so every blob is stored and thumbnailed once.
+    Files are never changed in place: they are written to temporary file
+    and atomically renamed.
+    """
+
+    @staticmethod
+    def content_hash(content) -> str:
+        digest = hashlib.sha256()
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def hashed_name(self, name, content) -> str:
+        digest = self.content_hash(content)
+        extension = os.path.splitext(name)[1].lower()
+        directory = posixpath.join(posixpath.dirname(name), digest[:2])
+        return posixpath.join(directory, digest[2:4], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(self.generate_filename(name), content)
+        if self.exists(name):
+            # Fresh mtime protects reused blob from garbage collection
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary, self.file_permissions_mode)
+            # Concurrent upload of the same content writes the same bytes
+            os.replace(temporary, full_path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
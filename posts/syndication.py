@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+from django.views.decorators.http import require_safe
+
+from .cache import etag, generations
+from .conditional import (Validators, author_scopes, group_scopes,
+                          index_scopes)
+from .models import Group, Post
+from .views import FEED_ORDERING
+
+User = get_user_model()
+
+SYNDICATION_KEY = "syndication:{}"
+# Items are plain dicts, text of post is the only big column
+ITEM_FIELDS = (
+    "id",
+    "text",
+    "pub_date",
+    "author__username",
+    "author__first_name",
+    "author__last_name",
+)
+
+
+def author_name(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+class PostFeed(Feed):
+    """RSS of latest posts read with one ``values()`` query."""
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        posts = self.posts(obj).order_by(*FEED_ORDERING)
+        return posts.values(*ITEM_FIELDS)[: settings.SYNDICATION_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item["text"]).words(10)
+
+    def item_description(self, item):
+        return linebreaks(item["text"], autoescape=True)
+
+    def item_link(self, item):
+        return reverse(
+            "post",
+            kwargs={
+                "username": item["author__username"],
+                "post_id": item["id"],
+            },
+        )
+
+    def item_pubdate(self, item):
+        return item["pub_date"]
+
+    def item_author_name(self, item):
+        return author_name(
+            item["author__first_name"],
+            item["author__last_name"],
+            item["author__username"],
+        )
+
+
+class AtomFeed:
+    """Atom variant of feed, its subtitle is description of RSS."""
+
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr("description", obj)
+
+
+class IndexFeed(PostFeed):
+    title = "Yatube"
+    description = "Последние обновления на сайте"
+
+    def link(self):
+        return reverse("index")
+
+
+class GroupFeed(PostFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(
+            Group.objects.only("id", "title", "slug", "description"),
+            slug=slug,
+        )
+
+    def title(self, group):
+        return f"Записи сообщества {group.title}"
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse("group_posts", kwargs={"slug": group.slug})
+
+    def posts(self, group):
+        return group.group_posts.all()
+
+
+class AuthorFeed(PostFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(
+            User.objects.only("id", "username", "first_name", "last_name"),
+            username=username,
+        )
+
+    def title(self, author):
+        name = author_name(
+            author.first_name, author.last_name, author.username
+        )
+        return f"Записи {name}"
+
+    def description(self, author):
+        return f"Последние записи {author.username}"
+
+    def link(self, author):
+        return reverse("profile", kwargs={"username": author.username})
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+class AtomIndexFeed(AtomFeed, IndexFeed):
+    pass
+
+
+class AtomGroupFeed(AtomFeed, GroupFeed):
+    pass
+
+
+class AtomAuthorFeed(AtomFeed, AuthorFeed):
+    pass
+
+
+def cached_feed(feed, scopes):
+    """Serve feed from cache keyed by generations of its scopes.
+
+    Generations are bumped by post writes, so unchanged feed answers
+    ``304`` or is sent from cache, and any change makes a new key. Feed
+    has absolute links, so key has scheme and host of request, but not
+    its query string, which feed ignores. One entry serves all readers.
+    """
+    validators = Validators("feed", scopes)
+
+    @require_safe
+    @validators
+    def view(request, **kwargs):
+        feed_scopes = validators.content_scopes(request, kwargs)
+        if feed_scopes is None:
+            return feed(request, **kwargs)
+        key = SYNDICATION_KEY.format(
+            etag(
+                request.scheme,
+                request.get_host(),
+                request.path,
+                *generations(*feed_scopes),
+            )
+        )
+        document = cache.get(key)
+        if document is None:
+            response = feed(request, **kwargs)
+            document = (response["Content-Type"], response.content)
+            cache.set(key, document, settings.SYNDICATION_CACHE_TTL)
+        content_type, content = document
+        return HttpResponse(content, content_type=content_type)
+
+    return view
+
+
+index_rss = cached_feed(IndexFeed(), index_scopes)
+index_atom = cached_feed(AtomIndexFeed(), index_scopes)
+group_rss = cached_feed(GroupFeed(), group_scopes)
+group_atom = cached_feed(AtomGroupFeed(), group_scopes)
+profile_rss = cached_feed(AuthorFeed(), author_scopes)
+profile_atom = cached_feed(AtomAuthorFeed(), author_scopes)
@@ -0,0 +1,14 @@
+from django import template
+
+from posts.thumbnails import post_picture as get_post_picture
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_picture(post, alias, batch=None):
+    """Ready picture of post image, placeholder or None.
+
+    ``batch`` of the page resolves thumbnails of all its posts at once.
+    """
+    return get_post_picture(post, alias, batch)
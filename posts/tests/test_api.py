@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+POST_KEYS = {
+    "id",
+    "text",
+    "pub_date",
+    "author",
+    "group",
+    "image",
+    "image_width",
+    "image_height",
+    "comment_count",
+}
+
+
+@override_settings(PER_PAGE_API=2)
+class ApiTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(username="leo")
+        cls.guest_client = Client()
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.urls = {
+            "api_index": reverse("api_index"),
+            "api_group_posts": reverse(
+                "api_group_posts", kwargs={"slug": "test-slug"}
+            ),
+            "api_profile": reverse(
+                "api_profile", kwargs={"username": "keplian"}
+            ),
+            "api_post": reverse(
+                "api_post",
+                kwargs={"post_id": Post.objects.latest("pk").pk},
+            ),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lists_are_compact_cursor_pages(self):
+        """Every list has posts with needed fields and next cursor."""
+        for number in range(3):
+            Post.objects.create(text=f"Paged {number}", author=self.user)
+        for name, url in self.urls.items():
+            if name == "api_post":
+                continue
+            with self.subTest(url=name):
+                data = self.guest_client.get(url).json()
+                self.assertEqual(set(data), {"results", "next", "previous"})
+                self.assertLessEqual(len(data["results"]), 2)
+                for post in data["results"]:
+                    self.assertEqual(set(post), POST_KEYS)
+        first = self.guest_client.get(self.urls["api_index"]).json()
+        second = self.guest_client.get(
+            self.urls["api_index"], {"cursor": first["next"]}
+        ).json()
+        self.assertLess(
+            second["results"][0]["id"], first["results"][-1]["id"]
+        )
+
+    def test_post_has_size_of_original_image(self):
+        """Client can reserve space for image before loading it."""
+        post = Post.objects.create(text="Sized", author=self.user)
+        Post.objects.filter(pk=post.pk).update(
+            image="posts/sized.jpg", image_width=100, image_height=50
+        )
+        data = self.guest_client.get(
+            reverse("api_post", kwargs={"post_id": post.pk})
+        ).json()
+        self.assertEqual(data["image"], "/media/posts/sized.jpg")
+        self.assertEqual(
+            (data["image_width"], data["image_height"]), (100, 50)
+        )
+
+    def test_unchanged_page_is_not_modified(self):
+        """Matching tag answers 304 before posts are read."""
+        for name, url in self.urls.items():
+            with self.subTest(url=name):
+                response = self.guest_client.get(url)
+                self.assertEqual(response["Cache-Control"], "no-cache")
+                tag = response["ETag"]
+                with self.assertNumQueries(0 if name == "api_index" else 1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=tag
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_tag(self):
+        """Page is sent again once its content changes."""
+        response = self.guest_client.get(self.urls["api_index"])
+        Post.objects.create(text="Fresh", author=self.user)
+        response = self.guest_client.get(
+            self.urls["api_index"], HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["text"], "Fresh")
+
+    def test_follow_feed_needs_session(self):
+        """Follow feed is private and anonymous client gets 401."""
+        url = reverse("api_follow_index")
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        author = User.objects.get(username="keplian")
+        Follow.objects.create(user=self.user, author=author)
+        response = self.user_client.get(url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertEqual(
+            {post["author"] for post in response.json()["results"]},
+            {"keplian"},
+        )
+
+    def test_missing_objects_are_not_found(self):
+        """Unknown group, author or post answer 404."""
+        for url in (
+            reverse("api_group_posts", kwargs={"slug": "missing"}),
+            reverse("api_profile", kwargs={"username": "missing"}),
+            reverse("api_post", kwargs={"post_id": 10 ** 6}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
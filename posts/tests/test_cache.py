@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.cache import generation
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.constants import URLS
+
+User = get_user_model()
+
+
+class FollowFeedCacheTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.leo = User.objects.get(pk=1)
+        cls.keplian = User.objects.get(pk=4)
+        cls.reader = User.objects.create_user("reader")
+        cls.other_reader = User.objects.create_user("other_reader")
+        Follow.objects.create(user=cls.reader, author=cls.leo)
+        Follow.objects.create(user=cls.other_reader, author=cls.keplian)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(FollowFeedCacheTests.reader)
+        self.other_client = Client()
+        self.other_client.force_login(FollowFeedCacheTests.other_reader)
+
+    def get_feed(self, client):
+        return client.get(URLS["follow_index"]["url"]).content.decode()
+
+    def test_feed_cache_is_per_user(self):
+        """Users don't see follow feed cached for somebody else."""
+        leo_post = Post.objects.create(text="Leo only", author=self.leo)
+        self.assertIn(leo_post.text, self.get_feed(self.reader_client))
+        self.assertNotIn(leo_post.text, self.get_feed(self.other_client))
+
+    def test_post_and_comment_invalidate_followers_feed(self):
+        """Post and comment writes refresh cached feed of followers."""
+        self.get_feed(self.reader_client)
+        post = Post.objects.create(text="Fresh post", author=self.leo)
+        self.assertIn(post.text, self.get_feed(self.reader_client))
+        Comment.objects.create(post=post, author=self.keplian, text="Hi")
+        self.assertIn("Комментариев: 1", self.get_feed(self.reader_client))
+        post.delete()
+        self.assertNotIn("Fresh post", self.get_feed(self.reader_client))
+
+    def test_writes_leave_followers_generations(self):
+        """Feed follows author's generation, writes don't visit readers."""
+        self.get_feed(self.reader_client)
+        version = generation("follow", self.reader.pk)
+        post = Post.objects.create(text="Fresh post", author=self.leo)
+        Comment.objects.create(post=post, author=self.keplian, text="Hi")
+        self.assertEqual(generation("follow", self.reader.pk), version)
+        self.assertIn("Комментариев: 1", self.get_feed(self.reader_client))
+
+    def test_unfollow_invalidates_feed(self):
+        """Unfollowed author's posts leave cached feed immediately."""
+        post = Post.objects.create(text="Before unfollow", author=self.leo)
+        self.assertIn(post.text, self.get_feed(self.reader_client))
+        Follow.objects.filter(user=self.reader, author=self.leo).delete()
+        self.assertNotIn(post.text, self.get_feed(self.reader_client))
+
+
+class GenerationCacheTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.leo = User.objects.get(pk=1)
+        cls.group = Group.objects.get(pk=1)
+        cls.wrong_group = Group.objects.get(pk=2)
+        cls.group_url = URLS["group_posts"]["url"]
+        cls.wrong_group_url = reverse(
+            "group_posts", kwargs={"slug": cls.wrong_group.slug}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_page(self, url):
+        return self.guest_client.get(url).content.decode()
+
+    def test_write_invalidates_only_affected_group(self):
+        """Post in one group keeps other group's page cached."""
+        self.get_page(self.group_url)
+        self.get_page(self.wrong_group_url)
+        wrong_generation = generation("group", self.wrong_group.pk)
+        post = Post.objects.create(
+            text="Grouped post", author=self.leo, group=self.group
+        )
+        self.assertIn(post.text, self.get_page(self.group_url))
+        self.assertEqual(
+            generation("group", self.wrong_group.pk), wrong_generation
+        )
+
+    def test_moved_post_invalidates_previous_group(self):
+        """Post moved to other group disappears from old group page."""
+        post = Post.objects.create(
+            text="Moving post", author=self.leo, group=self.group
+        )
+        self.assertIn(post.text, self.get_page(self.group_url))
+        post.group = self.wrong_group
+        post.save()
+        self.assertNotIn(post.text, self.get_page(self.group_url))
+        self.assertIn(post.text, self.get_page(self.wrong_group_url))
+
+    def test_group_and_comment_writes_bump_generations(self):
+        """Group edit and comment refresh cached index page."""
+        post = Post.objects.create(
+            text="Post in group", author=self.leo, group=self.group
+        )
+        self.get_page(URLS["index"]["url"])
+        self.group.title = "Renamed group"
+        self.group.save()
+        self.assertIn("Renamed group", self.get_page(URLS["index"]["url"]))
+        Comment.objects.create(post=post, author=self.leo, text="Hi")
+        self.assertIn("Комментариев: 1", self.get_page(URLS["index"]["url"]))
+
+    def test_post_delete_invalidates_once(self):
+        """Cascaded comments don't repeat counters and invalidation."""
+        queries = []
+        for comments in (1, 20):
+            post = Post.objects.create(
+                text="Deleted post", author=self.leo, group=self.group
+            )
+            for _ in range(comments):
+                Comment.objects.create(post=post, author=self.leo, text="Gone")
+            self.get_page(URLS["index"]["url"])
+            with CaptureQueriesContext(connection) as context:
+                post.delete()
+            queries.append(len(context))
+            self.assertNotIn(
+                "Deleted post", self.get_page(URLS["index"]["url"])
+            )
+        self.assertEqual(queries[0], queries[1])
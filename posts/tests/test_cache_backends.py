@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+from yatube.cache_backends import SQLiteCache
+
+
+def increment(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr("counter")
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.sqlite3")
+        self.cache = SQLiteCache(self.path, {"OPTIONS": {"CULL_EVERY": 1}})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_round_trip(self):
+        """Integers, strings and objects come back unchanged."""
+        values = {"int": 7, "bool": True, "text": "пост", "list": [1, "2"]}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many(values), values)
+        self.cache.delete_many(["int", "text"])
+        self.assertEqual(set(self.cache.get_many(values)), {"bool", "list"})
+
+    def test_timeout_and_add(self):
+        """Expired key is missing and may be added again."""
+        self.cache.set("key", "old", 0.05)
+        self.assertFalse(self.cache.add("key", "new"))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", "new", None))
+        self.assertEqual(self.cache.get("key"), "new")
+
+    def test_values_are_shared_between_instances(self):
+        """Another process' connection sees writes and invalidations."""
+        other = SQLiteCache(self.path, {})
+        self.cache.set("fragment", "html")
+        self.assertEqual(other.get("fragment"), "html")
+        other.delete("fragment")
+        self.assertIsNone(self.cache.get("fragment"))
+
+    def test_incr_is_atomic_between_processes(self):
+        """Concurrent increments from processes are never lost."""
+        self.cache.set("counter", 0)
+        processes = [
+            multiprocessing.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get("counter"), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_least_recently_used_are_evicted(self):
+        """Cache over MAX_ENTRIES drops keys not read for longest time."""
+        cache = SQLiteCache(
+            self.path,
+            {
+                "OPTIONS": {
+                    "MAX_ENTRIES": 4,
+                    "CULL_FREQUENCY": 4,
+                    "CULL_EVERY": 1,
+                    "ACCESS_RESOLUTION": 0,
+                }
+            },
+        )
+        for key in range(4):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get(0)
+        cache.set(4, 4)
+        self.assertEqual(set(cache.get_many(range(5))), {0, 3, 4})
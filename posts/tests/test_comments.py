@@ -0,0 +1,206 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import PATH_STEP, Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(PER_PAGE_COMMENTS=5)
+class CommentPaginationTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user("commented_author")
+        cls.post = Post.objects.create(text="Popular", author=cls.author)
+        cls.readers = [
+            User.objects.create_user(f"reader_{number}") for number in range(3)
+        ]
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.readers[number % 3],
+                text=f"Comment number {number}",
+            )
+            for number in range(12)
+        ]
+        cls.guest_client = Client()
+        kwargs = {"username": "commented_author", "post_id": cls.post.pk}
+        cls.post_url = reverse("post", kwargs=kwargs)
+        cls.fragment_url = reverse("post_comments", kwargs=kwargs)
+
+    def texts(self, response):
+        page = response.context["comment_page"]
+        return [comment.text for comment in page.comments]
+
+    def test_post_page_shows_first_comments(self):
+        """Only one page of comments is rendered, oldest first."""
+        response = self.guest_client.get(self.post_url)
+        self.assertEqual(
+            self.texts(response),
+            [f"Comment number {number}" for number in range(5)],
+        )
+        self.assertContains(response, "Показать ещё")
+
+    def test_newest_first_order(self):
+        """``?order=new`` starts from the latest comment."""
+        response = self.guest_client.get(self.post_url, {"order": "new"})
+        self.assertEqual(self.texts(response)[0], "Comment number 11")
+
+    def test_fragment_continues_after_cursor(self):
+        """"Load more" returns next comments without page layout."""
+        page = self.guest_client.get(self.post_url).context["comment_page"]
+        response = self.guest_client.get(
+            self.fragment_url, {"cursor": page.next_cursor}
+        )
+        self.assertTemplateUsed(response, "include/comment_list.html")
+        self.assertTemplateNotUsed(response, "base.html")
+        self.assertEqual(
+            self.texts(response),
+            [f"Comment number {number}" for number in range(5, 10)],
+        )
+        cursor = response.context["comment_page"].next_cursor
+        response = self.guest_client.get(self.fragment_url, {"cursor": cursor})
+        self.assertEqual(len(self.texts(response)), 2)
+        self.assertNotContains(response, "Показать ещё")
+
+    def test_comment_authors_are_joined(self):
+        """Amount of queries doesn't depend on comments on the page."""
+        with CaptureQueriesContext(connection) as few:
+            self.guest_client.get(self.fragment_url, {"order": "new"})
+        with override_settings(PER_PAGE_COMMENTS=12):
+            with CaptureQueriesContext(connection) as many:
+                self.guest_client.get(self.fragment_url, {"order": "new"})
+        self.assertEqual(len(few), len(many))
+
+    def test_fragment_of_other_author_is_not_found(self):
+        """Post is looked up together with its author."""
+        url = reverse(
+            "post_comments",
+            kwargs={"username": "reader_0", "post_id": self.post.pk},
+        )
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+
+@override_settings(PER_PAGE_COMMENTS=2, COMMENT_MAX_DEPTH=2)
+class CommentThreadTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user("thread_author")
+        cls.post = Post.objects.create(text="Discussed", author=cls.author)
+        cls.guest_client = Client()
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.author)
+        kwargs = {"username": "thread_author", "post_id": cls.post.pk}
+        cls.post_url = reverse("post", kwargs=kwargs)
+        cls.comment_url = reverse("add_comment", kwargs=kwargs)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.author, text=text, parent=parent
+        )
+
+    def texts(self, response):
+        page = response.context["comment_page"]
+        return [
+            (comment.depth, comment.text) for comment in page.comments
+        ]
+
+    def test_threads_are_shown_in_display_order(self):
+        """Replies follow their parent, threads are paged by root."""
+        first = self.comment("first")
+        second = self.comment("second")
+        self.comment("third")
+        reply = self.comment("reply", first)
+        self.comment("reply to reply", reply)
+        self.comment("other reply", second)
+        self.comment("late reply", first)
+        expected = [
+            (0, "first"),
+            (1, "reply"),
+            (2, "reply to reply"),
+            (1, "late reply"),
+            (0, "second"),
+            (1, "other reply"),
+        ]
+        response = self.guest_client.get(self.post_url)
+        self.assertEqual(self.texts(response), expected)
+        response = self.guest_client.get(self.post_url, {"order": "new"})
+        self.assertEqual(
+            self.texts(response),
+            [(0, "third"), (0, "second"), (1, "other reply")],
+        )
+
+    def test_subtree_is_one_path_range(self):
+        """Path of reply extends path of its parent."""
+        root = self.comment("root")
+        reply = self.comment("reply", root)
+        self.comment("sibling")
+        self.assertEqual(root.path, f"{root.pk:0{PATH_STEP}d}")
+        self.assertEqual(reply.path, root.path + f"{reply.pk:0{PATH_STEP}d}")
+        self.assertEqual(
+            list(Comment.objects.subtree(root.path)), [root, reply]
+        )
+
+    def test_deep_reply_is_attached_at_depth_limit(self):
+        """Reply to the deepest comment becomes its sibling."""
+        root = self.comment("root")
+        reply = self.comment("reply", root)
+        deepest = self.comment("deepest", reply)
+        deeper = self.comment("deeper", deepest)
+        self.assertEqual(deeper.depth, 2)
+        self.assertEqual(deeper.parent, reply)
+
+    def test_threads_are_read_at_once(self):
+        """Amount of queries doesn't depend on replies on the page."""
+        root = self.comment("root")
+        self.comment("reply", root)
+        with CaptureQueriesContext(connection) as few:
+            self.guest_client.get(self.post_url)
+        for number in range(5):
+            self.comment(f"reply {number}", root)
+        with CaptureQueriesContext(connection) as many:
+            self.guest_client.get(self.post_url)
+        self.assertEqual(len(few), len(many))
+
+    def test_reply_form_posts_parent(self):
+        """Reply is added to the thread of comment from the form."""
+        root = self.comment("root")
+        response = self.user_client.get(self.post_url, {"reply": root.pk})
+        self.assertContains(
+            response, f'name="parent" value="{root.pk}"', html=False
+        )
+        self.user_client.post(
+            self.comment_url, {"text": "answer", "parent": root.pk}
+        )
+        answer = Comment.objects.get(text="answer")
+        self.assertEqual((answer.parent, answer.depth), (root, 1))
+        other = Post.objects.create(text="Other", author=self.author)
+        foreign = Comment.objects.create(
+            post=other, author=self.author, text="foreign"
+        )
+        response = self.user_client.post(
+            self.comment_url, {"text": "stray", "parent": foreign.pk}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_user_replies_through_form(self):
+        """Form of any viewer posts to comments of post's author."""
+        root = self.comment("root")
+        reader_client = Client()
+        reader_client.force_login(User.objects.create_user("thread_reader"))
+        response = reader_client.get(self.post_url, {"reply": root.pk})
+        self.assertContains(response, f'action="{self.comment_url}"')
+        reader_client.post(
+            self.comment_url, {"text": "reader answer", "parent": root.pk}
+        )
+        answer = Comment.objects.get(text="reader answer")
+        self.assertEqual(answer.author.username, "thread_reader")
+        self.assertEqual((answer.parent, answer.depth), (root, 1))
@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import follows
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ConditionalTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(username="leo")
+        cls.author = User.objects.get(username="keplian")
+        cls.urls = {
+            "index": reverse("index"),
+            "group": reverse("group_posts", kwargs={"slug": "test-slug"}),
+            "profile": reverse("profile", kwargs={"username": "keplian"}),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def test_unchanged_page_is_not_modified(self):
+        """Matching tag answers 304 before posts are read."""
+        for name, url in self.urls.items():
+            with self.subTest(url=name):
+                tag = self.guest_client.get(url)["ETag"]
+                with self.assertNumQueries(0 if name == "index" else 1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=tag
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_for_anonymous_only(self):
+        """Settled page has date for guests, viewer's page has none."""
+        cache.set("modified:index", time.time() - 60, None)
+        response = self.guest_client.get(self.urls["index"])
+        response = self.guest_client.get(
+            self.urls["index"],
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.user_client.get(self.urls["index"])
+        self.assertFalse(response.has_header("Last-Modified"))
+
+    def test_tag_depends_on_viewer(self):
+        """Guest and user get different tags of the same page."""
+        for name, url in self.urls.items():
+            with self.subTest(url=name):
+                self.assertNotEqual(
+                    self.guest_client.get(url)["ETag"],
+                    self.user_client.get(url)["ETag"],
+                )
+
+    def test_changes_make_page_modified(self):
+        """New post or follow sends page again."""
+        url = self.urls["profile"]
+        tag = self.user_client.get(url)["ETag"]
+        follows.follow(self.user, self.author)
+        response = self.user_client.get(url, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["following"])
+        tag = response["ETag"]
+        Post.objects.create(text="Fresh conditional", author=self.author)
+        response = self.user_client.get(url, HTTP_IF_NONE_MATCH=tag)
+        self.assertContains(response, "Fresh conditional")
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from posts.models import Comment, Follow, Post, UserStats
+from posts.tests.constants import URLS
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user("counted_author")
+        cls.reader = User.objects.create_user("counted_reader")
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Writes keep counters equal to real amount of rows."""
+        post = Post.objects.create(text="Counted", author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text="Counted comment"
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.stats(self.author).post_count, 1)
+        self.assertEqual(self.stats(self.author).follower_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_drifted_zero_counters_stay_zero(self):
+        """Deletes don't fail on counters drifted to zero."""
+        post = Post.objects.create(text="Bulk commented", author=self.author)
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=self.reader, text="Uncounted")]
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.update(follower_count=0, following_count=0)
+        Comment.objects.get(post=post).delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(self.stats(self.author).follower_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_reconcile_fixes_drift(self):
+        """Command recounts counters broken by writes bypassing signals."""
+        post = Post.objects.create(text="Drifted", author=self.author)
+        Post.objects.filter(pk=post.pk).update(comment_count=7)
+        UserStats.objects.filter(user=self.author).update(post_count=42)
+        UserStats.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(self.stats(self.author).post_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertIn("1 posts", out.getvalue())
+
+    def test_profile_card_is_count_free(self):
+        """Author card shows stored counters."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = Client().get(
+            URLS["profile"]["url"].replace("leo", self.author.username)
+        )
+        self.assertContains(response, "Подписчиков: 1")
@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    fixtures = ["fixtures"]
+
+    def setUp(self):
+        self.staff = User.objects.create_user("export_staff", is_staff=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.url = reverse("api_export")
+
+    def counts(self):
+        return {
+            "groups": Group.objects.count(),
+            "posts": Post.objects.count(),
+            "comments": Comment.objects.count(),
+            "follows": Follow.objects.count(),
+        }
+
+    def tables(self, lines):
+        records = [json.loads(line) for line in lines if line]
+        found = {table: 0 for table in self.counts()}
+        for record in records:
+            found[record["table"]] += 1
+        return found, records
+
+    def test_command_writes_every_row(self):
+        """Gzipped file has one line per row and report is printed."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dump.ndjson.gz")
+            out = StringIO()
+            call_command(
+                "export_ndjson",
+                output=path,
+                gzip=True,
+                chunk_size=2,
+                stdout=out,
+            )
+            with gzip.open(path, "rt", encoding="utf-8") as dump:
+                found, _ = self.tables(dump.read().split("\n"))
+        self.assertEqual(found, self.counts())
+        self.assertIn("rows/s", out.getvalue())
+
+    def test_view_streams_chosen_tables(self):
+        """Staff gets streamed dump of asked tables."""
+        response = self.staff_client.get(self.url, {"tables": "posts"})
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        found, records = self.tables(content.split("\n"))
+        self.assertEqual(found["posts"], Post.objects.count())
+        self.assertEqual(
+            set(records[0]),
+            {
+                "table",
+                "id",
+                "text",
+                "pub_date",
+                "author_id",
+                "group_id",
+                "image",
+            },
+        )
+        response = self.staff_client.get(self.url, {"tables": "users"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_view_is_for_staff_only(self):
+        """Other users are sent to admin login."""
+        user_client = Client()
+        user_client.force_login(User.objects.get(username="leo"))
+        for client in (Client(), user_client):
+            with self.subTest(client=client):
+                response = client.get(self.url)
+                self.assertEqual(response.status_code, 302)
+                self.assertIn(reverse("admin:login"), response.url)
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from posts.models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT_CHUNK=2)
+class MaterializedFeedTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.get(pk=4)
+        cls.followers = [
+            User.objects.create_user(f"follower{i}") for i in range(5)
+        ]
+
+    def feed_posts(self, user):
+        return set(
+            FeedItem.objects.filter(user=user).values_list("post", flat=True)
+        )
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Following copies author's posts, unfollow removes them."""
+        follower = MaterializedFeedTests.followers[0]
+        author_posts = set(self.author.posts.values_list("pk", flat=True))
+        follow = Follow.objects.create(user=follower, author=self.author)
+        self.assertEqual(self.feed_posts(follower), author_posts)
+        follow.delete()
+        self.assertEqual(self.feed_posts(follower), set())
+
+    def test_new_post_fans_out_to_all_followers(self):
+        """New post lands in feed of every follower, in chunks."""
+        for follower in MaterializedFeedTests.followers:
+            Follow.objects.create(user=follower, author=self.author)
+        post = Post.objects.create(text="Fan out", author=self.author)
+        self.assertEqual(
+            FeedItem.objects.filter(post=post).count(),
+            len(MaterializedFeedTests.followers),
+        )
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import follows
+from posts.models import FeedItem, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class FollowTests(TestCase):
+    fixtures = ["fixtures"]
+
+    def setUp(self):
+        self.reader = User.objects.create_user("follow_reader")
+        self.author = User.objects.create_user("follow_author")
+        Post.objects.create(text="Followed post", author=self.author)
+        self.user_client = Client()
+        self.user_client.force_login(self.reader)
+        self.toggle_url = reverse(
+            "profile_follow_toggle", kwargs={"username": "follow_author"}
+        )
+
+    def counts(self):
+        return (
+            UserStats.objects.get(user=self.author).follower_count,
+            UserStats.objects.get(user=self.reader).following_count,
+            FeedItem.objects.filter(user=self.reader).count(),
+        )
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        """Repeated calls change nothing and don't fail."""
+        self.assertTrue(follows.follow(self.reader, self.author))
+        self.assertFalse(follows.follow(self.reader, self.author))
+        self.assertEqual(self.counts(), (1, 1, 1))
+        self.assertTrue(follows.unfollow(self.reader, self.author))
+        self.assertFalse(follows.unfollow(self.reader, self.author))
+        self.assertEqual(self.counts(), (0, 0, 0))
+        self.assertFalse(follows.follow(self.reader, self.reader))
+
+    def test_unfollow_without_follow_redirects(self):
+        """Unfollowing author who isn't followed is not an error."""
+        response = self.user_client.get(
+            reverse("profile_unfollow", kwargs={"username": "follow_author"})
+        )
+        self.assertRedirects(
+            response,
+            reverse("profile", kwargs={"username": "follow_author"}),
+        )
+
+    def test_toggle_returns_state_and_counts(self):
+        """Script gets new state, double click keeps it."""
+        for _ in range(2):
+            response = self.user_client.post(
+                self.toggle_url,
+                {"follow": "1"},
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+            self.assertEqual(
+                response.json(),
+                {"following": True, "follower_count": 1, "following_count": 1},
+            )
+        response = self.user_client.post(
+            self.toggle_url,
+            {"follow": "0"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.json()["following"], False)
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_toggle_without_script_and_login(self):
+        """Plain form goes back to profile, anonymous gets 401."""
+        response = self.user_client.post(self.toggle_url, {"follow": "1"})
+        self.assertRedirects(
+            response,
+            reverse("profile", kwargs={"username": "follow_author"}),
+        )
+        self.assertTrue(
+            Follow.objects.filter(
+                user=self.reader, author=self.author
+            ).exists()
+        )
+        self.assertEqual(Client().post(self.toggle_url).status_code, 401)
+        response = self.user_client.get(self.toggle_url)
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,83 @@
+import os
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+from posts.models import MediaBlob, Post
+from posts.storage import post_image_storage
+from posts.tests.test_thumbnails import TemporaryMediaMixin, make_image
+
+User = get_user_model()
+
+
+class MediaStorageTests(TemporaryMediaMixin, TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(id=1)
+
+    def create_post(self, **kwargs):
+        return Post.objects.create(
+            author=self.user, text="Picture", image=make_image(**kwargs)
+        )
+
+    def collect(self, **options):
+        out = StringIO()
+        call_command("collect_media", grace=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_same_content_is_stored_once(self):
+        """Posts with the same picture share one sharded file."""
+        first = self.create_post(name="one.PNG")
+        second = self.create_post(name="two.png")
+        name = first.image.name
+        digest = os.path.splitext(os.path.basename(name))[0]
+        self.assertEqual(
+            name, f"posts/{digest[:2]}/{digest[2:4]}/{digest}.png"
+        )
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(len(os.listdir(os.path.dirname(first.image.path))), 1)
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+
+    def test_references_follow_posts(self):
+        """Replaced and deleted images release their references."""
+        first = self.create_post()
+        second = self.create_post()
+        name = first.image.name
+        first.delete()
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+        second.image = make_image(color=(0, 0, 200))
+        second.save()
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 0)
+        self.assertEqual(
+            MediaBlob.objects.get(name=second.image.name).ref_count, 1
+        )
+
+    def test_garbage_collection(self):
+        """Only unused blobs and unknown files are deleted."""
+        used = self.create_post()
+        unused = self.create_post(color=(0, 0, 200))
+        name = unused.image.name
+        unused.delete()
+        orphan = post_image_storage.save("posts/lost.txt", ContentFile(b"x"))
+        self.assertIn("Would delete 2 files", self.collect(dry_run=True))
+        self.assertTrue(post_image_storage.exists(name))
+        self.assertIn("Deleted 2 files", self.collect())
+        self.assertFalse(post_image_storage.exists(name))
+        self.assertFalse(post_image_storage.exists(orphan))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertTrue(post_image_storage.exists(used.image.name))
+
+    def test_drifted_counter_is_fixed_not_collected(self):
+        """Blob counted as unused but still shown by post is kept."""
+        post = self.create_post()
+        MediaBlob.objects.filter(name=post.image.name).update(ref_count=0)
+        self.assertIn("Deleted 0 files", self.collect())
+        self.assertTrue(post_image_storage.exists(post.image.name))
+        self.assertEqual(
+            MediaBlob.objects.get(name=post.image.name).ref_count, 1
+        )
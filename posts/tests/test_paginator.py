@@ -0,0 +1,137 @@
+import base64
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from posts.cache import post_count_key
+from posts.models import Post
+from posts.paginator import (CachedCountPaginator, CursorPage,
+                             CursorPaginator)
+from posts.tests.constants import URLS
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(id=1)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f"Cursor post N{i}") for i in range(25)
+        )
+        cls.guest_client = Client()
+
+    def test_walk_all_pages_forward_and_back(self):
+        """Keyset pages cover every post once in feed order."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        expected = list(Post.objects.order_by("-pub_date", "-id"))
+        seen, pages = [], []
+        page = paginator.page()
+        while True:
+            pages.append(page)
+            seen.extend(page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, expected)
+        self.assertFalse(pages[0].has_previous())
+        back = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(back), list(pages[-2]))
+
+    def test_page_runs_single_query(self):
+        """Deep cursor page is one query without COUNT(*)."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        """Broken token shows first page instead of error."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = list(paginator.get_page())
+        self.assertEqual(list(paginator.get_page("garbage!")), first)
+
+    def test_crafted_cursor_falls_back_to_first_page(self):
+        """Well-formed token with unusable values is a bad cursor."""
+        first = list(Post.objects.order_by("-pub_date", "-id")[:10])
+        for values in (
+            [None, None],
+            ["2020-01-01T00:00:00", 10 ** 30],
+            ["2020-01-01T00:00:00", [1]],
+            ["2020-01-01T00:00:00", True],
+            [{"a": 1}, 1],
+            ["", 1],
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(["n", values]).encode()
+            ).decode()
+            with self.subTest(values=values):
+                response = CursorPaginatorTests.guest_client.get(
+                    URLS["index"]["url"], {"cursor": cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context["page"]), first)
+
+    def test_views_switch_to_cursor_mode(self):
+        """Feeds return CursorPage when ``cursor`` is in query string."""
+        response = CursorPaginatorTests.guest_client.get(
+            URLS["index"]["url"], {"cursor": ""}
+        )
+        page = response.context.get("page")
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(len(page), settings.PER_PAGE_INDEX)
+        response = CursorPaginatorTests.guest_client.get(
+            URLS["index"]["url"], {"cursor": page.next_cursor}
+        )
+        self.assertNotIn(page[0], response.context.get("page"))
+
+
+class CachedCountPaginatorTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(id=1)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f"Counted post N{i}") for i in range(98)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        """Second paginator takes count from cache without COUNT(*)."""
+        key = post_count_key("index")
+        CachedCountPaginator(Post.objects.all(), 10, count_key=key).count
+        paginator = CachedCountPaginator(Post.objects.all(), 10, count_key=key)
+        with self.assertNumQueries(1):
+            list(paginator.get_page(3))
+        self.assertEqual(paginator.count, 100)
+
+    def test_new_post_keeps_cached_count_exact(self):
+        """Post signals adjust cached count instead of dropping it."""
+        key = post_count_key("index")
+        CachedCountPaginator(Post.objects.all(), 10, count_key=key).count
+        Post.objects.create(author=self.user, text="One more")
+        self.assertEqual(cache.get(key), 101)
+
+    def test_elided_page_range(self):
+        """Only window around current page and ends are shown."""
+        paginator = CachedCountPaginator(Post.objects.all(), 10, count=100)
+        ellipsis = CachedCountPaginator.ELLIPSIS
+        cases = {
+            1: [1, 2, 3, ellipsis, 10],
+            5: [1, ellipsis, 3, 4, 5, 6, 7, ellipsis, 10],
+            9: [1, ellipsis, 7, 8, 9, 10],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    paginator.get_elided_page_range(number), expected
+                )
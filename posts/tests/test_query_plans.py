@@ -0,0 +1,129 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.constants import URLS
+
+User = get_user_model()
+
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def full_scans(plan):
+    """Plan steps reading whole table instead of an index."""
+    return [
+        step
+        for step in plan.splitlines()
+        if step.startswith("SCAN") and "USING" not in step
+    ]
+
+
+def index_scans(plan):
+    """Plan steps reading whole index instead of a range of it."""
+    return [step for step in plan.splitlines() if step.startswith("SCAN")]
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN")
+class QueryPlanTests(TestCase):
+    """Main queries of pages must read indexes, not scan and sort."""
+
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(pk=1)
+        cls.keplian = User.objects.get(pk=4)
+        Follow.objects.create(user=cls.user, author=cls.keplian)
+        post = Post.objects.create(text="Planned post", author=cls.keplian)
+        Comment.objects.create(post=post, author=cls.user, text="Planned")
+        # Every feed gets more than one page, so keyset query is planned
+        group = Group.objects.get(slug="test-slug")
+        for number in range(15):
+            Post.objects.create(
+                text=f"Paged {number}", author=cls.user, group=group
+            )
+            Post.objects.create(text=f"Followed {number}", author=cls.keplian)
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+
+    def query_plans(self, url, data=None):
+        """EXPLAIN every SELECT from posts tables run while rendering.
+
+        Queries are explained with their parameters bound, literals in
+        SQL let planner pick ranges it can't use with real query.
+        """
+        cache.clear()
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = self.user_client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                if not sql.startswith("SELECT") or "posts_" not in sql:
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = "\n".join(row[-1] for row in cursor.fetchall())
+                plans.append((sql, plan))
+        return plans
+
+    def assertIndexedPlans(
+        self, url, data=None, allow_sort=False, seek=False
+    ):
+        for sql, plan in self.query_plans(url, data):
+            with self.subTest(sql=sql):
+                self.assertEqual(full_scans(plan), [], plan)
+                if not allow_sort:
+                    self.assertNotIn(TEMP_SORT, plan)
+                if seek:
+                    self.assertEqual(index_scans(plan), [], plan)
+
+    def test_feed_pages_use_indexes(self):
+        """Feeds read post indexes in order for both pagination modes."""
+        urls = ("index", "group_posts", "profile", "follow_index")
+        for name in urls:
+            for data in ({}, {"page": 2}, {"cursor": ""}):
+                with self.subTest(url=name, data=data):
+                    self.assertIndexedPlans(URLS[name]["url"], data)
+
+    def test_cursor_pages_use_indexes(self):
+        """Keyset condition seeks feed indexes in both directions."""
+        for name in ("index", "group_posts", "profile", "follow_index"):
+            url = URLS[name]["url"]
+            cache.clear()
+            page = self.user_client.get(url, {"cursor": ""}).context["page"]
+            with self.subTest(url=name):
+                self.assertIsNotNone(page.next_cursor)
+                self.assertIndexedPlans(
+                    url, {"cursor": page.next_cursor}, seek=True
+                )
+                previous = self.user_client.get(
+                    url, {"cursor": page.next_cursor}
+                ).context["page"]
+                self.assertIndexedPlans(
+                    url, {"cursor": previous.previous_cursor}, seek=True
+                )
+
+    def test_post_page_uses_indexes(self):
+        """Post and its comments are read by primary key and index."""
+        post = Post.objects.get(text="Planned post")
+        url = reverse(
+            "post", kwargs={"username": "keplian", "post_id": post.pk}
+        )
+        self.assertIndexedPlans(url)
+
+    def test_search_uses_term_index(self):
+        """Search reads inverted index, ranking sort is allowed."""
+        self.assertIndexedPlans(
+            reverse("search"), {"q": "planned"}, allow_sort=True
+        )
@@ -0,0 +1,93 @@
+import os
+import shutil
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from PIL import Image
+from posts import resize, thumbnails
+from posts.models import Post
+from posts.tests.test_thumbnails import TemporaryMediaMixin, make_image
+
+User = get_user_model()
+
+
+class ResizeTests(TemporaryMediaMixin, TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def media_settings(cls, media_root):
+        cls.resize_cache_dir = os.path.join(media_root, "resize_cache")
+        return {
+            "MEDIA_ROOT": media_root,
+            "RESIZE_CACHE_DIR": cls.resize_cache_dir,
+        }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+
+    def setUp(self):
+        shutil.rmtree(self.resize_cache_dir, ignore_errors=True)
+        cache.delete(resize.CACHED_BYTES_KEY)
+        self.post = Post.objects.create(
+            author=User.objects.get(id=1), text="Picture", image=make_image()
+        )
+        self.name = self.post.image.name
+
+    def test_signed_url_serves_cached_variant(self):
+        """Variant is rendered once and cached by browsers for long."""
+        url = resize.resize_url(self.name, 40, 30)
+        with mock.patch.object(resize, "render", wraps=resize.render) as run:
+            response = self.guest_client.get(url)
+            self.guest_client.get(url)
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        content = BytesIO(b"".join(response.streaming_content))
+        with Image.open(content) as image:
+            self.assertEqual(image.size, (40, 30))
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unsigned_url_is_not_served(self):
+        """Forged size or path gets 404 and renders nothing."""
+        signature = resize.sign(self.name, 40, 30)
+        for width, name in ((41, self.name), (40, "posts/other.png")):
+            with self.subTest(width=width, name=name):
+                response = self.guest_client.get(
+                    f"/media/resize/{signature}/{width}x30/{name}"
+                )
+                self.assertEqual(response.status_code, 404)
+        forged = "0" * len(signature)
+        response = self.guest_client.get(
+            f"/media/resize/{forged}/40x30/{self.name}",
+            HTTP_IF_NONE_MATCH=f'"{forged}"',
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(os.path.exists(self.resize_cache_dir))
+
+    def test_least_recently_used_variants_are_evicted(self):
+        """Disk cache is capped, recently served variants stay."""
+        old = resize.get_variant(self.name, 10, 10)
+        os.utime(old, (0, 0))
+        size = os.path.getsize(old)
+        with override_settings(RESIZE_CACHE_MAX_BYTES=int(size * 2.5)):
+            kept = resize.get_variant(self.name, 10, 11)
+            resize.get_variant(self.name, 11, 10)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(kept))
+
+    def test_lost_thumbnails_fall_back_to_resize(self):
+        """Feed falls back to signed URL instead of rendering."""
+        Post.objects.filter(pk=self.post.pk).update(thumbnails_ready=True)
+        self.post.refresh_from_db()
+        with mock.patch.object(thumbnails, "get_thumbnail") as get:
+            picture = thumbnails.post_picture(self.post, "feed")
+        get.assert_not_called()
+        self.assertEqual(picture.src, resize.resize_url(self.name, 960, 339))
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, SearchTerm
+from posts.search import search
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(pk=1)
+        cls.rare = Post.objects.create(
+            author=cls.user, text="Кот и пёс. Кот спит, пёс лает."
+        )
+        cls.common = Post.objects.create(
+            author=cls.user, text="Кот гуляет сам по себе"
+        )
+        cls.other = Post.objects.create(author=cls.user, text="Про собак")
+
+    def test_search_ranks_posts_with_all_words(self):
+        """Only posts with every word are found, frequent first."""
+        self.assertEqual(list(search("кот")), [self.rare, self.common])
+        self.assertEqual(list(search("КОТ пёс")), [self.rare])
+        self.assertEqual(list(search("кот лиса")), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Edited and deleted posts are reindexed incrementally."""
+        self.other.text = "Теперь про кота"
+        self.other.save()
+        self.assertEqual(list(search("собак")), [])
+        self.assertEqual(list(search("кота")), [self.other])
+        self.other.delete()
+        self.assertFalse(SearchTerm.objects.filter(term="кота").exists())
+
+    def test_search_view_and_admin(self):
+        """Search page and admin changelist use the index."""
+        response = Client().get(reverse("search"), {"q": "пёс"})
+        self.assertEqual(list(response.context["page"]), [self.rare])
+        admin = site._registry[Post]
+        found, _ = admin.get_search_results(None, Post.objects.all(), "пёс")
+        self.assertEqual(list(found), [self.rare])
+
+    def test_search_view_without_results(self):
+        """Empty, too short or unknown query shows empty page."""
+        cursor = "WyJuIiwgWzEuMCwgMV1d"  # ["n", [1.0, 1]]
+        for params in (
+            {},
+            {"q": ""},
+            {"q": "к"},
+            {"q": "лиса"},
+            {"q": "кот лиса"},
+            {"q": "лиса", "cursor": cursor},
+            {"q": "", "cursor": cursor},
+        ):
+            with self.subTest(params=params):
+                response = Client().get(reverse("search"), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context["page"]), [])
+
+    def test_rebuild_command(self):
+        """Rebuild indexes posts loaded bypassing signals."""
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(list(search("keplian")), [Post.objects.get(pk=2)])
+
+    def test_search_keyset_pagination(self):
+        """Ranked results are paginated by cursor without repeats."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f"Зебра номер {i}") for i in range(15)
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+        client = Client()
+        response = client.get(reverse("search"), {"q": "зебра"})
+        first = response.context["page"]
+        response = client.get(
+            reverse("search"), {"q": "зебра", "cursor": first.next_cursor}
+        )
+        second = response.context["page"]
+        self.assertEqual(len(first) + len(second), 15)
+        self.assertFalse(set(first) & set(second))
+        self.assertContains(response, "q=%D0%B7%D0%B5%D0%B1%D1%80%D0%B0&")
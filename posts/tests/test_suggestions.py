@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Follow, FollowSuggestion
+from posts.suggestions import FollowGraph
+from posts.tests.constants import URLS
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    fixtures = ["fixtures"]
+
+    def setUp(self):
+        Follow.objects.all().delete()
+        self.reader, self.friend, self.other, self.star, self.fellow = [
+            User.objects.create_user(f"graph_{name}")
+            for name in ("reader", "friend", "other", "star", "fellow")
+        ]
+        for user, author in (
+            (self.reader, self.friend),
+            (self.reader, self.other),
+            (self.friend, self.star),
+            (self.other, self.star),
+            (self.fellow, self.friend),
+        ):
+            Follow.objects.create(user=user, author=author)
+        self.user_client = Client()
+        self.user_client.force_login(self.reader)
+
+    def compute(self):
+        out = StringIO()
+        call_command("compute_follow_suggestions", stdout=out)
+        return out.getvalue()
+
+    def test_friends_of_friends_rank_above_co_follows(self):
+        """Author followed by two friends beats user with same taste."""
+        graph = FollowGraph.load()
+        self.assertEqual(graph.edges, 5)
+        self.assertEqual(
+            graph.suggest(self.reader.pk, 10, 100),
+            [(self.star.pk, 4), (self.fellow.pk, 1)],
+        )
+        self.assertEqual(graph.suggest(self.star.pk, 10, 100), [])
+        self.assertEqual(graph.suggest(-1, 10, 100), [])
+
+    def test_hubs_are_sampled_by_latest_follows(self):
+        """Only latest follows of crowded author are looked at."""
+        graph = FollowGraph.load()
+        self.assertEqual(
+            graph.suggest(self.reader.pk, 10, 1),
+            [(self.star.pk, 4), (self.fellow.pk, 1)],
+        )
+
+    def test_pages_show_stored_suggestions(self):
+        """Follow feed and profile read top suggestions of visitor."""
+        output = self.compute()
+        self.assertIn("for 5 users from 5 follows", output)
+        for name in ("follow_index", "profile"):
+            with self.subTest(url=name):
+                response = self.user_client.get(URLS[name]["url"])
+                self.assertEqual(
+                    [s.author for s in response.context["suggestions"]],
+                    [self.star, self.fellow],
+                )
+                self.assertContains(response, "Кого почитать")
+                self.assertContains(
+                    response,
+                    reverse(
+                        "profile_follow_toggle",
+                        kwargs={"username": self.star.username},
+                    ),
+                )
+                follow_url = reverse(
+                    "profile_follow", kwargs={"username": self.star.username}
+                )
+                self.assertNotContains(response, f'href="{follow_url}"')
+
+    def test_followed_and_stale_suggestions_are_gone(self):
+        """Followed author is hidden at once, next run drops old rows."""
+        self.compute()
+        Follow.objects.create(user=self.reader, author=self.star)
+        response = self.user_client.get(URLS["follow_index"]["url"])
+        self.assertEqual(
+            [s.author for s in response.context["suggestions"]],
+            [self.fellow],
+        )
+        Follow.objects.filter(user=self.reader).delete()
+        self.compute()
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=self.reader).exists()
+        )
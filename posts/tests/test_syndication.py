@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class SyndicationTests(TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.get(username="keplian")
+        cls.guest_client = Client()
+        cls.urls = {
+            "index_rss": reverse("index_rss"),
+            "index_atom": reverse("index_atom"),
+            "group_rss": reverse("group_rss", kwargs={"slug": "test-slug"}),
+            "group_atom": reverse("group_atom", kwargs={"slug": "test-slug"}),
+            "profile_rss": reverse(
+                "profile_rss", kwargs={"username": "keplian"}
+            ),
+            "profile_atom": reverse(
+                "profile_atom", kwargs={"username": "keplian"}
+            ),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_latest_posts(self):
+        """Every feed is valid document with links to posts of scope."""
+        group = Group.objects.get(slug="test-slug")
+        post = Post.objects.create(
+            text="Syndicated <post>", author=self.author, group=group
+        )
+        link = reverse(
+            "post", kwargs={"username": "keplian", "post_id": post.pk}
+        )
+        for name, url in self.urls.items():
+            with self.subTest(url=name):
+                response = self.guest_client.get(url)
+                kind = name.split("_")[1]
+                self.assertIn(kind, response["Content-Type"])
+                self.assertContains(response, link)
+                self.assertContains(response, "Syndicated &lt;post&gt;")
+
+    def test_feed_is_cached_until_post_write(self):
+        """Cached feed takes no queries, new post is in the next one."""
+        url = self.urls["index_rss"]
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text="Fresh syndicated", author=self.author)
+        self.assertContains(self.guest_client.get(url), "Fresh syndicated")
+
+    def test_missing_scope_is_not_found(self):
+        """Unknown group or author answers 404."""
+        for url in (
+            reverse("group_rss", kwargs={"slug": "missing"}),
+            reverse("profile_atom", kwargs={"username": "missing"}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_feed_is_cached_per_host_and_scheme(self):
+        """Absolute links of cached feed match host and scheme of reader."""
+        url = self.urls["index_rss"]
+        self.guest_client.get(url)
+        for host, secure in (("localhost", False), ("testserver", True)):
+            with self.subTest(host=host, secure=secure):
+                response = self.guest_client.get(
+                    url, HTTP_HOST=host, secure=secure
+                )
+                scheme = "https" if secure else "http"
+                self.assertContains(response, f"<link>{scheme}://{host}/")
+
+    def test_query_string_shares_cached_feed(self):
+        """Arbitrary query strings don't make new cache entries."""
+        url = self.urls["index_rss"]
+        self.guest_client.get(url)
+        for query in ("?utm_source=a", "?page=2&x=1"):
+            with self.subTest(query=query):
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url + query)
+                self.assertEqual(response.status_code, 200)
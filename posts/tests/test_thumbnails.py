@@ -0,0 +1,340 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from posts import thumbnails
+from posts.management.commands.regenerate_thumbnails import \
+    settings_signature
+from posts.models import Post
+from posts.tests.constants import URLS
+from posts.uploads import BoundedUploadHandler
+
+User = get_user_model()
+
+
+class TemporaryMediaMixin:
+    """Case with own ``MEDIA_ROOT`` made in system temp directory.
+
+    Directory exists from ``setUpClass`` till ``tearDownClass``.
+    """
+
+    @classmethod
+    def media_settings(cls, media_root):
+        return {"MEDIA_ROOT": media_root}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(
+            **cls.media_settings(cls.media_root)
+        )
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+def make_image(
+    name="photo.png", image_format="PNG", color=(200, 0, 0), **params
+):
+    content = BytesIO()
+    Image.new("RGB", (100, 50), color).save(content, image_format, **params)
+    return SimpleUploadedFile(name, content.getvalue())
+
+
+class ThumbnailTests(TemporaryMediaMixin, TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.get(id=1)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.user, text="Picture", image=make_image()
+        )
+
+    def test_feed_shows_placeholder_until_ready(self):
+        """Page with new image renders nothing and shows placeholder."""
+        with mock.patch.object(thumbnails, "get_thumbnail") as render:
+            response = self.guest_client.get(URLS["index"]["url"])
+        render.assert_not_called()
+        self.assertFalse(self.post.thumbnails_ready)
+        self.assertContains(response, 'src="data:image/svg+xml,')
+
+    def test_rendered_thumbnail_replaces_placeholder(self):
+        """Worker job marks post ready and feed shows real thumbnail."""
+        self.guest_client.get(URLS["index"]["url"])
+        self.assertTrue(thumbnails.render_post(self.post.pk, self.post.image))
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnails_ready)
+        response = self.guest_client.get(URLS["index"]["url"])
+        self.assertNotContains(response, 'src="data:image/svg+xml,')
+        self.assertContains(response, f'src="{settings.MEDIA_URL}cache/')
+        self.assertContains(response, '<source type="image/webp" srcset="')
+        for width in settings.THUMBNAIL_WIDTHS:
+            self.assertContains(response, f" {width}w", count=2)
+
+    def test_size_and_placeholder_are_stored(self):
+        """Feed reserves space for image and fills it with blurred copy."""
+        thumbnails.render_post(self.post.pk, self.post.image.name)
+        self.post.refresh_from_db()
+        self.assertEqual(
+            (self.post.image_width, self.post.image_height), (100, 50)
+        )
+        placeholder = self.post.image_placeholder
+        self.assertTrue(placeholder.startswith("data:image/jpeg;base64,"))
+        self.assertLess(len(placeholder), 1000)
+        Post.objects.create(
+            author=self.user,
+            text="Newer picture",
+            image=make_image(color=(0, 0, 200)),
+        )
+        response = self.guest_client.get(URLS["index"]["url"])
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, f"background: url({placeholder})")
+        self.assertContains(response, 'loading="eager"', count=1)
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_metadata_is_stripped(self):
+        """Original is rewritten upright and without EXIF."""
+        exif = Image.Exif()
+        exif[thumbnails.EXIF_ORIENTATION] = 6
+        self.post.image = make_image("exif.jpg", "JPEG", exif=exif)
+        self.post.save()
+        thumbnails.render_post(self.post.pk, self.post.image.name)
+        self.post.refresh_from_db()
+        with Image.open(self.post.image.path) as image:
+            self.assertEqual(image.size, (50, 100))
+            self.assertEqual(dict(image.getexif()), {})
+        self.assertEqual(
+            (self.post.image_width, self.post.image_height), (50, 100)
+        )
+
+    def test_new_image_resets_ready_flag(self):
+        """Replaced image is rendered again, stale job does nothing."""
+        old_name = self.post.image.name
+        thumbnails.render_post(self.post.pk, old_name)
+        self.post.refresh_from_db()
+        self.post.image = make_image("other.png", color=(0, 200, 0))
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.thumbnails_ready)
+        self.assertEqual(self.post.image_placeholder, "")
+        self.assertFalse(thumbnails.render_post(self.post.pk, old_name))
+        self.post.text = "Only text is changed"
+        self.post.save()
+        self.assertTrue(
+            thumbnails.render_post(self.post.pk, self.post.image.name)
+        )
+        self.post.refresh_from_db()
+        self.post.text = "Text again"
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnails_ready)
+
+    def test_thumbnail_names_match_sorl(self):
+        """Batch computes the same files sorl renders."""
+        thumbnails.render_post(self.post.pk, self.post.image.name)
+        self.post.refresh_from_db()
+        source = ImageFile(self.post.image)
+        for _, geometry, options in thumbnails.variants("feed"):
+            with self.subTest(geometry=geometry, options=options):
+                self.assertEqual(
+                    thumbnails.thumbnail_file(source, geometry, options).name,
+                    get_thumbnail(self.post.image, geometry, **options).name,
+                )
+
+    def test_page_thumbnails_are_one_lookup(self):
+        """Feed page looks up thumbnails of all posts with one get_many."""
+        for color in range(settings.PER_PAGE_INDEX):
+            post = Post.objects.create(
+                author=self.user,
+                text="Picture",
+                image=make_image(color=(color % 2, 0, 0)),
+            )
+            thumbnails.render_post(post.pk, post.image.name)
+        kv_cache = caches[thumbnail_settings.THUMBNAIL_CACHE]
+        prefix = thumbnail_settings.THUMBNAIL_KEY_PREFIX
+        lookups = []
+
+        def get_many(keys, *args, **kwargs):
+            keys = list(keys)
+            if keys and str(keys[0]).startswith(prefix):
+                lookups.append(keys)
+            return original(keys, *args, **kwargs)
+
+        original = kv_cache.get_many
+        with mock.patch.object(kv_cache, "get_many", get_many), \
+                mock.patch.object(KVStore, "_get_raw") as single_lookup:
+            response = self.guest_client.get(URLS["index"]["url"])
+        single_lookup.assert_not_called()
+        self.assertEqual(len(lookups), 1)
+        # Posts share two distinct images, their keys are asked once
+        variants = len(list(thumbnails.variants("feed")))
+        self.assertEqual(len(lookups[0]), 2 * variants)
+        self.assertContains(response, "<picture>", settings.PER_PAGE_INDEX)
+
+
+class ImageIngestionTests(TemporaryMediaMixin, TestCase):
+    fixtures = ["fixtures"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_client = Client()
+        cls.user_client.force_login(User.objects.get(id=1))
+
+    def post_image(self):
+        return self.user_client.post(
+            URLS["new_post"]["url"],
+            {"text": "Big picture", "image": make_image()},
+        )
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_oversized_upload_is_rejected(self):
+        """Upload above byte limit gets its own error, nothing is saved."""
+        count = Post.objects.count()
+        response = self.post_image()
+        self.assertEqual(
+            response.context["form"].errors["image"],
+            ["Файл больше 100\xa0байт"],
+        )
+        self.assertEqual(Post.objects.count(), count)
+
+    def test_bounded_handler_only_in_post_form_views(self):
+        """Other views keep default handlers, CSRF is still checked."""
+        response = self.post_image()
+        self.assertIsInstance(
+            response.wsgi_request.upload_handlers[0], BoundedUploadHandler
+        )
+        response = self.user_client.get(URLS["index"]["url"])
+        self.assertNotIsInstance(
+            response.wsgi_request.upload_handlers[0], BoundedUploadHandler
+        )
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.force_login(User.objects.get(id=1))
+        response = csrf_client.post(
+            URLS["new_post"]["url"], {"text": "Forged"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_are_rejected(self):
+        """Image dimensions are checked before decoding."""
+        response = self.post_image()
+        self.assertEqual(
+            response.context["form"].errors["image"][0],
+            "Слишком большое изображение: 100×50",
+        )
+
+
+class RegenerateThumbnailsTests(TemporaryMediaMixin, TestCase):
+    fixtures = ["fixtures"]
+
+    def setUp(self):
+        user = User.objects.get(id=1)
+        self.posts = [
+            Post.objects.create(
+                author=user, text="Picture", image=make_image(color=color)
+            )
+            for color in ((1, 0, 0), (1, 0, 0), (2, 0, 0))
+        ]
+        self.checkpoint = os.path.join(self.media_root, "checkpoint.json")
+
+    def regenerate(self, **options):
+        out = StringIO()
+        call_command(
+            "regenerate_thumbnails",
+            processes=0,
+            batch_size=2,
+            checkpoint=self.checkpoint,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_all_posts_are_rendered_once_per_image(self):
+        """Shared image is rendered once and pending posts become ready."""
+        output = self.regenerate()
+        self.assertIn("Rendered 2 images of 3 posts", output)
+        self.assertIn("images/s", output)
+        self.assertFalse(
+            Post.objects.filter(
+                pk__in=[post.pk for post in self.posts],
+                thumbnails_ready=False,
+            ).exists()
+        )
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_run_resumes_from_checkpoint(self):
+        """Posts up to checkpoint are skipped unless restarted."""
+        with open(self.checkpoint, "w") as file:
+            json.dump(
+                {
+                    "signature": settings_signature(),
+                    "last_pk": self.posts[1].pk,
+                },
+                file,
+            )
+        output = self.regenerate()
+        self.assertIn(f"Resuming after post {self.posts[1].pk}", output)
+        self.assertIn("Rendered 1 images of 1 posts", output)
+        self.posts[0].refresh_from_db()
+        self.assertFalse(self.posts[0].thumbnails_ready)
+        self.assertIn("of 3 posts", self.regenerate(restart=True))
+
+    def test_failed_batch_stops_checkpoint(self):
+        """Checkpoint stays before failed image, rerun renders it again."""
+        broken = self.posts[2].image.name
+        render = thumbnails.render_thumbnails
+
+        def render_or_fail(image):
+            if image.name == broken:
+                raise OSError("broken")
+            return render(image)
+
+        with mock.patch.object(
+            thumbnails, "render_thumbnails", side_effect=render_or_fail
+        ):
+            output = self.regenerate(stderr=StringIO())
+        self.assertIn("1 failed", output)
+        with open(self.checkpoint) as file:
+            self.assertEqual(json.load(file)["last_pk"], self.posts[1].pk)
+        output = self.regenerate()
+        self.assertIn("Rendered 1 images of 1 posts", output)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_backfill_describes_old_posts(self):
+        """Posts uploaded before placeholders get them once per image."""
+        out = StringIO()
+        call_command("backfill_image_placeholders", stdout=out)
+        self.assertIn("Backfilled 3 posts, 0 images failed.", out.getvalue())
+        self.assertFalse(
+            Post.objects.filter(
+                pk__in=[post.pk for post in self.posts], image_width=None
+            ).exists()
+        )
+        out = StringIO()
+        call_command("backfill_image_placeholders", stdout=out)
+        self.assertIn("Backfilled 0 posts", out.getvalue())
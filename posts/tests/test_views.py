@@ -2,9 +2,11 @@ from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls.base import reverse
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
 from posts.tests.constants import URLS
 
 User = get_user_model()
@@ -108,19 +110,17 @@ class PostPagesTests(TestCase):
         self.assertNotIn(test_post, response.context.get("page"))
 
     def test_cache_is_working_on_index_page(self):
-        """Cache 20 sec on index page for posts"""
+        """Index page is cached until post generation is bumped."""
         response = PostPagesTests.guest_client.get(URLS["index"]["url"])
-        content_response_before = response.content
-        Post.objects.create(text="test_cache", author=PostPagesTests.user)
+        content_before = response.content
+        Post.objects.filter(author=PostPagesTests.user).update(
+            text="Changed without signals"
+        )
         response = PostPagesTests.guest_client.get(URLS["index"]["url"])
-        content_after = response.content
-        self.assertEqual(content_response_before, content_after)
-        cache.clear()
+        self.assertEqual(content_before, response.content)
+        Post.objects.create(text="test_cache", author=PostPagesTests.user)
         response = PostPagesTests.guest_client.get(URLS["index"]["url"])
-        lenght_response_after_sleep = response.content
-        self.assertNotEqual(
-            content_response_before, lenght_response_after_sleep
-        )
+        self.assertNotEqual(content_before, response.content)
 
     def test_follower_can_follow_and_unfollow(self):
         """User can follow and unfollow author.
@@ -157,3 +157,21 @@ class PostPagesTests(TestCase):
             user=PostPagesTests.user, author=keplian
         ).exists()
         self.assertFalse(follow_exists)
+
+    def test_feed_queries_do_not_depend_on_posts_amount(self):
+        """Post cards are rendered with constant number of queries."""
+        keplian = User.objects.get(pk=4)
+
+        def count_index_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                PostPagesTests.authorized_client.get(URLS["index"]["url"])
+            return len(queries)
+
+        few_posts_queries = count_index_queries()
+        for post in Post.objects.all()[:5]:
+            Comment.objects.create(post=post, author=keplian, text="Comment")
+        Post.objects.create(
+            text="Other group", author=keplian, group=self.wrong_group
+        )
+        self.assertEqual(count_index_queries(), few_posts_queries)
@@ -0,0 +1,397 @@
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageFilter, ImageOps
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import cache, media
+from .models import Post
+from .resize import resize_url
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {} {}">'
+    '<rect width="100%" height="100%" fill="#e9ecef"/></svg>'
+)
+MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+# Originals of other formats (GIF animations) are kept as is
+REENCODED_FORMATS = ("JPEG", "PNG", "WEBP")
+METADATA = {"exif", "xmp", "XML:com.adobe.xmp", "comment", "photoshop"}
+EXIF_ORIENTATION = 0x0112
+# Longer side of blurred placeholder, its data URI takes a few hundred
+# bytes and browser stretches it over the whole image box
+PLACEHOLDER_SIZE = 16
+
+_executor = None
+_executor_lock = Lock()
+
+
+class Picture:
+    """Post image in every rendered width and format.
+
+    ``sources`` are pairs of mime type and ``srcset`` for preferred
+    formats, ``src`` and ``srcset`` are for fallback ``<img>``. ``width``
+    and ``height`` let browser reserve space before image is loaded, and
+    ``placeholder`` is shown there meanwhile.
+    """
+
+    def __init__(
+        self,
+        src,
+        srcset="",
+        sources=(),
+        sizes="",
+        width=None,
+        height=None,
+        placeholder="",
+    ):
+        self.src = src
+        self.srcset = srcset
+        self.sources = sources
+        self.sizes = sizes
+        self.width = width
+        self.height = height
+        self.placeholder = placeholder
+
+    @classmethod
+    def pending(cls, width, height, placeholder=""):
+        """Grey SVG of the same proportions as image being rendered.
+
+        Page layout doesn't jump when real image replaces it.
+        """
+        svg = PLACEHOLDER_SVG.format(width, height)
+        return cls(
+            "data:image/svg+xml," + quote(svg),
+            width=width,
+            height=height,
+            placeholder=placeholder,
+        )
+
+    @classmethod
+    def resized(cls, name, width, height, sizes, placeholder=""):
+        """JPEG variants served by signed on-demand resize endpoint."""
+        urls = [
+            (scaled, resize_url(name, scaled, round(height * scaled / width)))
+            for scaled in settings.THUMBNAIL_WIDTHS
+        ]
+        _, src = min(urls, key=lambda item: abs(item[0] - width))
+        srcset = ", ".join(f"{url} {scaled}w" for scaled, url in urls)
+        return cls(src, srcset, (), sizes, width, height, placeholder)
+
+
+def _size(geometry):
+    width, height = geometry.split("x")
+    return int(width), int(height)
+
+
+def _srcset(rendered):
+    return ", ".join(
+        f"{thumbnail.url} {thumbnail.width}w" for _, thumbnail in rendered
+    )
+
+
+def variants(alias):
+    """Format, geometry and options of every rendition of alias.
+
+    Geometry of alias is scaled to each of ``THUMBNAIL_WIDTHS``.
+    """
+    geometry, options = settings.THUMBNAIL_GEOMETRIES[alias]
+    width, height = _size(geometry)
+    for image_format in settings.THUMBNAIL_FORMATS:
+        for scaled in settings.THUMBNAIL_WIDTHS:
+            yield (
+                image_format,
+                f"{scaled}x{round(height * scaled / width)}",
+                dict(options, format=image_format),
+            )
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+    return _executor
+
+
+def render_thumbnails(image):
+    """Render every variant of ``THUMBNAIL_GEOMETRIES`` for image."""
+    return [
+        get_thumbnail(image, geometry, **options)
+        for alias in settings.THUMBNAIL_GEOMETRIES
+        for _, geometry, options in variants(alias)
+    ]
+
+
+def strip_metadata(image):
+    """Save original image upright and without EXIF, XMP, comments.
+
+    JPEG which doesn't need rotation keeps its quantization tables, so
+    quality isn't lost. Return name of cleaned file.
+    """
+    with image.open("rb"), Image.open(image) as source:
+        if source.width * source.height > settings.IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image {image.name} has too many pixels")
+        image_format = source.format
+        exif = source.getexif()
+        orientation = exif.get(EXIF_ORIENTATION, 1)
+        if image_format not in REENCODED_FORMATS or not (
+            exif or METADATA.intersection(source.info)
+        ):
+            return image.name
+        params = {"format": image_format}
+        if "icc_profile" in source.info:
+            params["icc_profile"] = source.info["icc_profile"]
+        if orientation != 1:
+            source = ImageOps.exif_transpose(source)
+            params["quality"] = 95
+        elif image_format == "JPEG":
+            params["quality"] = "keep"
+        elif image_format == "WEBP":
+            params["quality"] = 95
+        content = BytesIO()
+        source.save(content, **params)
+    # Original may be shared by other posts, so cleaned copy is saved
+    # under its own name instead of replacing it
+    name = image.field.generate_filename(
+        image.instance, os.path.basename(image.name)
+    )
+    return image.storage.save(name, ContentFile(content.getvalue()))
+
+
+def describe_image(image) -> dict:
+    """Size of upright image and its tiny blurred copy as data URI.
+
+    Returned dict updates post fields. JPEG is decoded right at reduced
+    scale, so this costs much less than thumbnail rendering.
+    """
+    with image.open("rb"), Image.open(image) as source:
+        if source.width * source.height > settings.IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image {image.name} has too many pixels")
+        orientation = source.getexif().get(EXIF_ORIENTATION, 1)
+        width, height = source.size
+        if orientation in (5, 6, 7, 8):
+            width, height = height, width
+        source.draft("RGB", (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))
+        tiny = ImageOps.exif_transpose(source.convert("RGB"))
+    tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    content = BytesIO()
+    tiny.save(content, "JPEG", quality=40, optimize=True)
+    encoded = base64.b64encode(content.getvalue()).decode()
+    return {
+        "image_width": width,
+        "image_height": height,
+        "image_placeholder": f"data:image/jpeg;base64,{encoded}",
+    }
+
+
+def render_post(post_id, name):
+    """Clean post image, render its thumbnails and mark them ready.
+
+    Image may be replaced while job waits in queue, then job is stale
+    and newer one will do the work.
+    """
+    post = Post.objects.filter(pk=post_id, image=name).first()
+    if post is None:
+        return False
+    stripped = strip_metadata(post.image)
+    if stripped != name:
+        if Post.objects.filter(pk=post_id, image=name).update(image=stripped):
+            media.replace_reference(name, stripped)
+        post.image.name = name = stripped
+    described = describe_image(post.image)
+    render_thumbnails(post.image)
+    marked = Post.objects.filter(pk=post_id, image=name).update(
+        thumbnails_ready=True, **described
+    )
+    if marked:
+        cache.bump_post_generations(post.author_id, post.group_id)
+    return bool(marked)
+
+
+def _run(post_id, name):
+    try:
+        render_post(post_id, name)
+    except Exception:
+        logger.exception("Can't render thumbnails of post %s", post_id)
+
+
+def _run_in_worker(post_id, name):
+    try:
+        _run(post_id, name)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """Render thumbnails of post image in worker pool after commit.
+
+    With ``THUMBNAIL_WORKERS = 0`` job runs in current thread.
+    """
+    post_id, name = post.pk, post.image.name
+
+    def submit():
+        if settings.THUMBNAIL_WORKERS:
+            _get_executor().submit(_run_in_worker, post_id, name)
+        else:
+            _run(post_id, name)
+
+    transaction.on_commit(submit)
+
+
+def thumbnail_file(source, geometry, options):
+    """Thumbnail file sorl would look up, computed without any I/O.
+
+    Options are completed with defaults exactly like
+    ``ThumbnailBackend.get_thumbnail`` does before naming the file.
+    """
+    backend = default.backend
+    options = dict(options)
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def lookup_thumbnails(files):
+    """Return stored thumbnails of ``files`` by key, missing are absent.
+
+    Instead of lookup per thumbnail all keys are read with one
+    ``get_many`` of the cache behind sorl's ``cached_db`` store, and keys
+    missing there with one query to its table.
+    """
+    kvstore = default.kvstore
+    keys = {add_prefix(file.key): file.key for file in files}
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        found = {file.key: kvstore.get(file) for file in files}
+        return {key: file for key, file in found.items() if file}
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing).values_list(
+                "key", "value"
+            )
+        )
+        empty = cached_db_kvstore.EMPTY_VALUE
+        values.update({key: stored.get(key, empty) for key in missing})
+        kvstore.cache.set_many(
+            {key: values[key] for key in missing},
+            thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items()
+        if value is not cached_db_kvstore.EMPTY_VALUE
+    }
+
+
+class PictureBatch:
+    """Pictures of every post on a page resolved together.
+
+    Thumbnails of all posts are found with one key-value store
+    round-trip, when the first picture is asked for. Page rendered from
+    fragment cache never asks and costs nothing.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self._pictures = {}
+
+    def get(self, post, alias):
+        if alias not in self._pictures:
+            self._pictures[alias] = self._resolve(alias)
+        pictures = self._pictures[alias]
+        if post.pk not in pictures:
+            pictures.update(PictureBatch([post])._resolve(alias))
+        return pictures[post.pk]
+
+    def _resolve(self, alias):
+        geometry, _ = settings.THUMBNAIL_GEOMETRIES[alias]
+        width, height = _size(geometry)
+        pictures, wanted = {}, {}
+        for post in self.posts:
+            if not post.image:
+                pictures[post.pk] = None
+            elif not post.thumbnails_ready:
+                pictures[post.pk] = Picture.pending(
+                    width, height, post.image_placeholder
+                )
+            else:
+                source = ImageFile(post.image)
+                wanted[post] = [
+                    (variant, thumbnail_file(source, *variant[1:]))
+                    for variant in variants(alias)
+                ]
+        found = lookup_thumbnails(
+            file for files in wanted.values() for _, file in files
+        )
+        for post, files in wanted.items():
+            pictures[post.pk] = self._picture(post, alias, files, found)
+        return pictures
+
+    @staticmethod
+    def _picture(post, alias, files, found):
+        geometry, _ = settings.THUMBNAIL_GEOMETRIES[alias]
+        width, height = _size(geometry)
+        sizes = f"(min-width: {width}px) {width}px, 100vw"
+        if any(file.key not in found for _, file in files):
+            # Ready but unknown to key-value store, e.g. right after
+            # geometry change: page links variants resized on demand
+            return Picture.resized(
+                post.image.name, width, height, sizes, post.image_placeholder
+            )
+        rendered = {}
+        for (image_format, scaled, _), file in files:
+            rendered.setdefault(image_format, []).append(
+                (_size(scaled)[0], found[file.key])
+            )
+        *preferred, fallback = settings.THUMBNAIL_FORMATS
+        _, src = min(
+            rendered[fallback], key=lambda item: abs(item[0] - width)
+        )
+        return Picture(
+            src.url,
+            _srcset(rendered[fallback]),
+            [
+                (MIME_TYPES[name], _srcset(rendered[name]))
+                for name in preferred
+            ],
+            sizes,
+            width,
+            height,
+            post.image_placeholder,
+        )
+
+
+def post_picture(post, alias, batch=None):
+    """Return ready picture of post image or placeholder.
+
+    Rendering is never done here, so page latency doesn't include
+    resizing of just uploaded images. Pass ``batch`` of the page to
+    look up thumbnails of all its posts at once.
+    """
+    return (batch or PictureBatch([post])).get(post, alias)
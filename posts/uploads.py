@@ -0,0 +1,42 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Stream upload to temporary file on disk in chunks.
+
+    Bytes beyond ``IMAGE_MAX_UPLOAD_SIZE`` are dropped instead of being
+    written, so huge upload never fills memory or disk. Size of file
+    still reports all received bytes and ``PostForm`` rejects it, so
+    the handler is used only by views of that form.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_MAX_UPLOAD_SIZE:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+
+def bounded_uploads(view):
+    """Receive uploads of view with ``BoundedUploadHandler``.
+
+    Handlers must be replaced before CSRF middleware reads POST, so
+    view is exempted from middleware and checked right after.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [BoundedUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return wrapper
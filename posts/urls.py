@@ -1,17 +1,56 @@
 from django.urls import path
 
-from . import views
+from . import api, syndication, views
 
 urlpatterns = [
+    path("api/v1/posts/", api.index, name="api_index"),
+    path("api/v1/posts/<int:post_id>/", api.post_view, name="api_post"),
+    path(
+        "api/v1/groups/<slug:slug>/posts/",
+        api.group_posts,
+        name="api_group_posts",
+    ),
+    path(
+        "api/v1/users/<str:username>/posts/",
+        api.profile,
+        name="api_profile",
+    ),
+    path("api/v1/follow/", api.follow_index, name="api_follow_index"),
+    path("api/v1/export/", api.export, name="api_export"),
+    path("rss/", syndication.index_rss, name="index_rss"),
+    path("atom/", syndication.index_atom, name="index_atom"),
+    path("group/<slug:slug>/rss/", syndication.group_rss, name="group_rss"),
+    path(
+        "group/<slug:slug>/atom/", syndication.group_atom, name="group_atom"
+    ),
     path("", views.index, name="index"),
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
     path("new/", views.new_post, name="new_post"),
     path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search_posts, name="search"),
+    path(
+        "media/resize/<str:signature>/<int:width>x<int:height>/<path:name>",
+        views.resize_image,
+        name="resize_image",
+    ),
     path("<str:username>/", views.profile, name="profile"),
+    path(
+        "<str:username>/rss/", syndication.profile_rss, name="profile_rss"
+    ),
+    path(
+        "<str:username>/atom/",
+        syndication.profile_atom,
+        name="profile_atom",
+    ),
     path("<str:username>/<int:post_id>/", views.post_view, name="post"),
     path(
         "<str:username>/<int:post_id>/edit/", views.post_edit, name="post_edit"
     ),
+    path(
+        "<str:username>/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path(
         "<username>/<int:post_id>/comment",
         views.add_comment,
@@ -20,6 +59,11 @@ urlpatterns = [
     path(
         "<str:username>/follow/", views.profile_follow, name="profile_follow"
     ),
+    path(
+        "<str:username>/follow/toggle/",
+        views.profile_follow_toggle,
+        name="profile_follow_toggle",
+    ),
     path(
         "<str:username>/unfollow/",
         views.profile_unfollow,
@@ -2,37 +2,141 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, JsonResponse
 from django.http.response import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import etag, require_POST, require_safe
 
 from posts.forms import CommentForm, PostForm
 
-from .models import Follow, Group, Post
+from .cache import follow_feed_version, generation, post_count_key
+from .counters import get_user_stats, recount_user_stats
+from .models import Comment, Follow, Group, Post, UserStats
+from . import conditional, follows, resize
+from .paginator import CachedCountPaginator, CursorPaginator
+from .search import search
+from .suggestions import get_suggestions
+from .thumbnails import PictureBatch
+from .uploads import bounded_uploads
 
 User = get_user_model()
 
+FEED_ORDERING = ("-pub_date", "-id")
+# Follow feed is sorted by FeedItem columns to read its index in order
+FOLLOW_FEED_ORDERING = ("-feed_pub_date", "-feed_post_id")
+# Threads are shown oldest first unless ``?order=new`` is asked for, path
+# of top-level comment is its zero-padded id
+COMMENT_ORDERINGS = {"old": ("path",), "new": ("-path",)}
 
+
+def get_page(
+    request, object_list, per_page, ordering=FEED_ORDERING, **count_options
+):
+    """Return page of posts for request query string.
+
+    ``?cursor=`` switches feed to keyset pagination by ``ordering``,
+    which never runs ``COUNT(*)`` or ``OFFSET``, otherwise numbered
+    ``?page=`` is used. ``count_key`` or ``count`` options take total
+    count from cache or denormalized counter instead of ``COUNT(*)``.
+    Thumbnails of the whole page are looked up in one batch.
+    """
+    if "cursor" in request.GET:
+        paginator = CursorPaginator(object_list, per_page, ordering)
+        page = paginator.get_page(request.GET.get("cursor"))
+    else:
+        if count_options:
+            paginator = CachedCountPaginator(
+                object_list, per_page, **count_options
+            )
+        else:
+            paginator = Paginator(object_list, per_page)
+        page = paginator.get_page(request.GET.get("page"))
+    page.pictures = PictureBatch(page)
+    return page
+
+
+@conditional.Validators("html", conditional.index_scopes)
 def index(request):
     """Show latest 10 posts in main page sorted desc."""
-    latest = Post.objects.all()
-    paginator = Paginator(latest, settings.PER_PAGE_INDEX)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "index.html", {"page": page})
+    latest = Post.objects.feed()
+    page = get_page(
+        request,
+        latest,
+        settings.PER_PAGE_INDEX,
+        count_key=post_count_key("index"),
+    )
+    return render(
+        request,
+        "index.html",
+        {"page": page, "generation": generation("index")},
+    )
 
 
+@conditional.Validators("html", conditional.group_scopes)
 def group_posts(request, slug):
     """Show last 12 posts in desc sort by selected group."""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.group_posts.all()
-    paginator = Paginator(posts, settings.PER_PAGE_GROUP)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "group.html", {"group": group, "page": page})
+    posts = group.group_posts.feed()
+    page = get_page(
+        request,
+        posts,
+        settings.PER_PAGE_GROUP,
+        count_key=post_count_key("group", group.pk),
+    )
+    return render(
+        request,
+        "group.html",
+        {
+            "group": group,
+            "page": page,
+            "generation": generation("group", group.pk),
+        },
+    )
+
+
+def search_posts(request):
+    """Show posts with all words of ``q`` sorted by relevance."""
+    query = request.GET.get("q", "").strip()
+    paginator = CursorPaginator(
+        search(query), settings.PER_PAGE_INDEX, ordering=("-rank", "-id")
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    page.pictures = PictureBatch(page)
+    return render(request, "search.html", {"page": page, "q": query})
+
+
+def resize_etag(request, signature, width, height, name):
+    """Signature is tag of the variant, forged URL gets no tag."""
+    if resize.check_signature(signature, name, width, height):
+        return signature
+    return None
+
+
+@require_safe
+@etag(resize_etag)
+def resize_image(request, signature, width, height, name):
+    """Serve post image cropped to size from disk cache.
+
+    Only URLs signed by the site are served, so nobody can make server
+    render arbitrary sizes. Signature is unique for variant and image
+    names are content hashes, so response never changes.
+    """
+    if not resize.check_signature(signature, name, width, height):
+        raise Http404
+    try:
+        path = resize.get_variant(name, width, height)
+        response = FileResponse(open(path, "rb"), content_type="image/jpeg")
+    except (OSError, ValueError):
+        raise Http404
+    response["Cache-Control"] = (
+        f"public, max-age={settings.RESIZE_MAX_AGE}, immutable"
+    )
+    return response
 
 
 @login_required
+@bounded_uploads
 def new_post(request):
     """Create form for new post and save post in db."""
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -44,13 +148,19 @@ def new_post(request):
     return render(request, "new_post.html", {"form": form})
 
 
+@conditional.Validators(
+    "html", conditional.profile_scopes, conditional.viewer_follows
+)
 def profile(request, username):
     following = False
-    user = get_object_or_404(User, username=username)
-    user_posts = user.posts.all()
-    paginator = Paginator(user_posts, settings.PER_PAGE_GROUP)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
+    stats = get_user_stats(user)
+    user_posts = user.posts.feed()
+    page = get_page(
+        request, user_posts, settings.PER_PAGE_GROUP, count=stats.post_count
+    )
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user, author=user
@@ -58,24 +168,88 @@ def profile(request, username):
     return render(
         request,
         "profile.html",
-        {"author": user, "page": page, "following": following},
+        {
+            "author": user,
+            "page": page,
+            "following": following,
+            "generation": generation("author", user.pk),
+            "suggestions": get_suggestions(request.user, exclude=user),
+        },
     )
 
 
+def get_comment_page(request, post):
+    """Return keyset page of top-level comments of post.
+
+    ``?order=`` picks one of ``COMMENT_ORDERINGS``, ``?cursor=`` continues
+    after the last thread shown. ``page.comments`` are whole threads of
+    the page with authors, read by one range query.
+    """
+    order = request.GET.get("order")
+    if order not in COMMENT_ORDERINGS:
+        order = "old"
+    paginator = CursorPaginator(
+        post.comments.filter(depth=0).only("id", "post", "path"),
+        settings.PER_PAGE_COMMENTS,
+        COMMENT_ORDERINGS[order],
+    )
+    page = paginator.get_page(request.GET.get("cursor"))
+    page.order = order
+    page.comments = Comment.objects.threads(page)
+    return page
+
+
 def post_view(request, username, post_id):
     "Show post for specified author username and post id"
     form = CommentForm()
-    user = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    user = get_object_or_404(
+        User.objects.select_related("stats"), username=username
+    )
+    get_user_stats(user)
+    post = get_object_or_404(Post.objects.feed(), id=post_id)
+    comment_page = get_comment_page(request, post)
+    reply = request.GET.get("reply", "")
+    reply_to = None
+    if reply.isdigit():
+        reply_to = (
+            post.comments.select_related("author").filter(pk=reply).first()
+        )
     return render(
         request,
         "post.html",
-        {"author": user, "post": post, "comments": comments, "form": form},
+        {
+            "author": user,
+            "post": post,
+            # Lazy queryset of top-level comments, only its page is read
+            "comments": comment_page.paginator.object_list,
+            "comment_page": comment_page,
+            "form": form,
+            "reply_to": reply_to,
+        },
+    )
+
+
+@require_safe
+def post_comments(request, username, post_id):
+    """Next page of comments for "load more" button of post page."""
+    post = get_object_or_404(
+        Post.objects.only("id", "author__username"),
+        id=post_id,
+        author__username=username,
+    )
+    return render(
+        request,
+        "include/comment_list.html",
+        {
+            "post": post,
+            "author": post.author,
+            "comment_page": get_comment_page(request, post),
+        },
     )
 
 
 @login_required()
+@bounded_uploads
 def post_edit(request, username, post_id):
     "Edit existing post, if user not a post's author - redirect to post page"
     profile = get_object_or_404(User, username=username)
@@ -108,13 +282,18 @@ def server_error(request):
 
 @login_required
 def add_comment(request, post_id, username):
-    """Add comment to target post."""
+    """Add comment to target post, or reply to comment of ``parent``."""
     form = CommentForm(request.POST or None)
     if form.is_valid():
         post = get_object_or_404(Post, author__username=username, id=post_id)
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
+        parent = request.POST.get("parent", "")
+        if parent.isdigit():
+            comment.parent = get_object_or_404(
+                Comment, pk=parent, post=post
+            )
         comment.save()
     return redirect("post", username, post_id)
 
@@ -122,14 +301,22 @@ def add_comment(request, post_id, username):
 @login_required
 def follow_index(request):
     """Show index page only with posts only by followed author."""
-    following_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(following_posts, settings.PER_PAGE_INDEX)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    page = get_page(
+        request,
+        Post.objects.follow_feed(request.user),
+        settings.PER_PAGE_INDEX,
+        ordering=FOLLOW_FEED_ORDERING,
+    )
     return render(
         request,
         "follow.html",
-        {"page": page, "paginator": paginator},
+        {
+            "page": page,
+            "paginator": page.paginator,
+            "feed_version": follow_feed_version(request.user.pk),
+            "cache_timeout": settings.FEED_CACHE_TTL,
+            "suggestions": get_suggestions(request.user),
+        },
     )
 
 
@@ -137,11 +324,7 @@ def follow_index(request):
 def profile_follow(request, username):
     """Make user follower and author following."""
     author = get_object_or_404(User, username=username)
-    follow_exists = Follow.objects.filter(
-        user=request.user, author=author
-    ).exists()
-    if request.user != author and not follow_exists:
-        Follow.objects.create(user=request.user, author=author)
+    follows.follow(request.user, author)
     return redirect("profile", username)
 
 
@@ -149,5 +332,37 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     """Unfollow target author from followeing authors."""
     author = get_object_or_404(User, username=username)
-    Follow.objects.get(user=request.user, author=author).delete()
+    follows.unfollow(request.user, author)
     return redirect("profile", username)
+
+
+@require_POST
+def profile_follow_toggle(request, username):
+    """Set ``follow=1`` or ``follow=0`` state, answer with counters.
+
+    Button sends the state it wants instead of "toggle", so double click
+    doesn't undo itself. Form posted without script gets profile page.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "login required"}, status=401)
+    author = get_object_or_404(User.objects.only("id"), username=username)
+    following = request.POST.get("follow") == "1"
+    if following:
+        following = author.pk != request.user.pk
+        follows.follow(request.user, author)
+    else:
+        follows.unfollow(request.user, author)
+    if request.headers.get("x-requested-with") != "XMLHttpRequest":
+        return redirect("profile", username)
+    stats = UserStats.objects.in_bulk((author.pk, request.user.pk))
+    author_stats = stats.get(author.pk) or recount_user_stats(author.pk)
+    user_stats = stats.get(request.user.pk) or recount_user_stats(
+        request.user.pk
+    )
+    return JsonResponse(
+        {
+            "following": following,
+            "follower_count": author_stats.follower_count,
+            "following_count": user_stats.following_count,
+        }
+    )
@@ -1,4 +1,23 @@
+import pytest
+from django.test.utils import override_settings
+
+from yatube.testing import temporary_caches
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def render_thumbnails_inline(settings):
+    # Worker threads can't share in-memory test database with tests
+    settings.THUMBNAIL_WORKERS = 0
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_cache(tmp_path_factory):
+    # Cache file of the site is shared by its processes, tests use own one
+    directory = str(tmp_path_factory.mktemp("cache"))
+    with override_settings(CACHES=temporary_caches(directory)):
+        yield
@@ -0,0 +1,245 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+    " expires REAL, accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)",
+)
+# SQLite allows 999 bound variables in one statement
+MAX_VARIABLES = 500
+
+
+class SQLiteCache(BaseCache):
+    """Cache shared by all processes of the host in one SQLite file.
+
+    Database is in WAL mode, so readers never wait for the writer, and
+    every gunicorn worker sees fragments and invalidations of others
+    without external service. Entries above ``MAX_ENTRIES`` are evicted
+    by least recent access. Integers are stored as is and ``incr`` runs
+    in ``BEGIN IMMEDIATE`` transaction, so counters are atomic between
+    processes.
+
+    Options besides standard ones:
+        CULL_EVERY: check size of cache once per this many writes
+        ACCESS_RESOLUTION: seconds between updates of access time of key
+        BUSY_TIMEOUT: seconds to wait for lock of another writer
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location
+        self._cull_every = int(options.get("CULL_EVERY", 100))
+        self._access_resolution = float(options.get("ACCESS_RESOLUTION", 1))
+        self._busy_timeout = float(options.get("BUSY_TIMEOUT", 5))
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        """Connection of current thread, reopened in forked process."""
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self._path, timeout=self._busy_timeout, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db, self._local.pid = db, pid
+        return self._local.db
+
+    @contextmanager
+    def _write(self):
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _encode(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _touch_accessed(self, keys, now):
+        stale = now - self._access_resolution
+        for start in range(0, len(keys), MAX_VARIABLES):
+            chunk = keys[start:start + MAX_VARIABLES]
+            marks = ",".join("?" * len(chunk))
+            self._db.execute(
+                f"UPDATE cache SET accessed = ? "
+                f"WHERE accessed < ? AND key IN ({marks})",
+                (now, stale, *chunk),
+            )
+
+    def _after_write(self, db):
+        self._writes += 1
+        if self._writes % self._cull_every == 0:
+            self._cull(db)
+
+    def _cull(self, db):
+        """Drop expired entries, then least recently used over limit."""
+        db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        (count,) = db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            db.execute("DELETE FROM cache")
+            return
+        excess = count - self._max_entries
+        db.execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+            (excess + self._max_entries // self._cull_frequency,),
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            db.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now)
+            )
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)",
+                (
+                    key,
+                    self._encode(value),
+                    self.get_backend_timeout(timeout),
+                    now,
+                ),
+            )
+            self._after_write(db)
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            "SELECT value, expires, accessed FROM cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return default
+        if row[2] < now - self._access_resolution:
+            self._touch_accessed([key], now)
+        return self._decode(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        now = time.time()
+        found, used = {}, []
+        names = list(keys)
+        for start in range(0, len(names), MAX_VARIABLES):
+            chunk = names[start:start + MAX_VARIABLES]
+            marks = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, value, accessed FROM cache "
+                f"WHERE key IN ({marks}) "
+                f"AND (expires IS NULL OR expires > ?)",
+                (*chunk, now),
+            )
+            for name, value, accessed in rows:
+                found[keys[name]] = self._decode(value)
+                if accessed < now - self._access_resolution:
+                    used.append(name)
+        if used:
+            self._touch_accessed(used, now)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self._key(key, version), self._encode(value), expires, now)
+            for key, value in data.items()
+        ]
+        with self._write() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", rows
+            )
+            self._after_write(db)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._db.execute(
+            "UPDATE cache SET expires = ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        name = self._key(key, version)
+        with self._write() as db:
+            row = db.execute(
+                "SELECT value FROM cache "
+                "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (name, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = self._decode(row[0]) + delta
+            db.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (self._encode(value), name),
+            )
+        return value
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        cursor = self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        names = [self._key(key, version) for key in keys]
+        with self._write() as db:
+            for start in range(0, len(names), MAX_VARIABLES):
+                chunk = names[start:start + MAX_VARIABLES]
+                marks = ",".join("?" * len(chunk))
+                db.execute(f"DELETE FROM cache WHERE key IN ({marks})", chunk)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            "SELECT 1 FROM cache "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache")
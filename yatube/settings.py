@@ -20,7 +20,7 @@ INTERNAL_IPS = [
 
 INSTALLED_APPS = [
     "about",
-    "posts",
+    "posts.apps.PostsConfig",
     "users",
     "django.contrib.admin",
     "django.contrib.auth",
@@ -133,9 +133,62 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 PER_PAGE_INDEX = 10
 PER_PAGE_GROUP = 12
-
+PER_PAGE_COMMENTS = 20
+PER_PAGE_API = 20
+# Authors stored per user by compute_follow_suggestions and shown of them
+FOLLOW_SUGGESTIONS_TOP = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+# Neighbours of one author looked at while scoring suggestions
+FOLLOW_SUGGESTIONS_MAX_DEGREE = 200
+# Replies to deeper comments are attached at this level, at most 24
+COMMENT_MAX_DEPTH = 4
+# Seconds numbered paginator may show stale total count of posts
+PAGINATOR_COUNT_TTL = 60
+# Posts in RSS and Atom feeds, cached documents expire after TTL seconds
+SYNDICATION_ITEMS = 20
+SYNDICATION_CACHE_TTL = 60 * 60
+# Rows fetched from database at once by NDJSON export
+EXPORT_CHUNK_SIZE = 2000
+# Words of search query beyond this limit are ignored
+SEARCH_MAX_TERMS = 10
+
+# One SQLite file in WAL mode is shared by all worker processes
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "BACKEND": "yatube.cache_backends.SQLiteCache",
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION", os.path.join(BASE_DIR, "cache.sqlite3")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
 }
+# Tests use temporary cache file instead of the one of the site
+TEST_RUNNER = "yatube.testing.TestRunner"
+
+# Images of posts are streamed to disk, bytes above limit are dropped
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+# Larger images are rejected before decoding (decompression bombs)
+IMAGE_MAX_PIXELS = 40_000_000
+
+# Variants of signed /media/resize/ URLs, least recently used are evicted
+RESIZE_CACHE_DIR = os.path.join(BASE_DIR, "resize_cache")
+RESIZE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESIZE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Unused image files are deleted by collect_media after this many seconds
+MEDIA_GC_GRACE = 24 * 60 * 60
+
+# Thumbnails rendered in background after upload: alias -> geometry, options
+THUMBNAIL_GEOMETRIES = {
+    "feed": ("960x339", {"crop": "center", "upscale": True}),
+}
+# Every alias is rendered in these widths and formats, last one is fallback
+THUMBNAIL_WIDTHS = (480, 960, 1920)
+THUMBNAIL_FORMATS = ("WEBP", "JPEG")
+# Threads rendering thumbnails, 0 renders them right after commit
+THUMBNAIL_WORKERS = 2
+
+# Followers are written to materialized feeds in chunks of this size
+FEED_FANOUT_CHUNK = 500
+# Cached follow feed pages are invalidated by signals, TTL is a safety net
+FEED_CACHE_TTL = 300
@@ -0,0 +1,36 @@
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def temporary_caches(directory):
+    """``CACHES`` of settings with cache file placed in ``directory``."""
+    caches = copy.deepcopy(settings.CACHES)
+    caches["default"]["LOCATION"] = os.path.join(directory, "cache.sqlite3")
+    return caches
+
+
+class TestRunner(DiscoverRunner):
+    """Run tests with their own temporary cache file.
+
+    Cache file of the site is shared by its processes, tests must not
+    read or clear it.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.mkdtemp(prefix="yatube-cache-")
+        self.cache_settings = override_settings(
+            CACHES=temporary_caches(self.cache_directory)
+        )
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)